@@ -1,4 +1,9 @@
 import sys
 sys.path.append("./h5sh")
 
-from h5sh.h5shell import H5shell
+def __getattr__(name):
+    # import the shell lazily, the client must start without importing h5py
+    if name == "H5shell":
+        from h5sh.h5shell import H5shell
+        return H5shell
+    raise AttributeError("module 'h5sh' has no attribute '{}'".format(name))
@@ -7,12 +7,14 @@ class ASCII:
     
     ETX = 3   # end of text (ctrl+c)
     EOT = 4   # end of transmission (ctrl+d)
+    BEL = 7   # bell (ctrl+g)
     BS  = 8   # backspace
     TAB = 9   # horizontal tab
     LF  = 10  # line feed (new line)
     VT  = 11  # vertical tab
     FF  = 12  # form feed (new page)
     CR  = 13  # carriage return (enter)
+    DC2 = 18  # device control 2 (ctrl+r)
     SUB = 26  # substitute ctrl+z
     ESC = 27  # starts escape sequence
     DEL = 127 # backspace gives this
@@ -0,0 +1,153 @@
+"""
+Render simple plots with block characters.
+"""
+
+import numpy as np
+
+# characters filling 0/8, 1/8, ..., 7/8 of a cell from the left
+HORIZONTAL_EIGHTHS = " ▏▎▍▌▋▊▉"
+FULL_BLOCK = "█"
+# characters filling 0/8, 1/8, ..., 8/8 of a cell from the bottom
+VERTICAL_EIGHTHS = " ▁▂▃▄▅▆▇█"
+
+def format_number(x):
+    """Format a number for labels."""
+    return "{:.4g}".format(x)
+
+def hbar(value, maxValue, width):
+    """
+    Return a horizontal bar of block characters.
+
+    :param value: Length of the bar in data units.
+    :param maxValue: Value that corresponds to a bar of full width.
+    :param width: Maximum number of characters of the bar.
+    """
+
+    if maxValue <= 0 or value <= 0:
+        return ""
+    eighths = int(round(min(value/maxValue, 1)*width*8))
+    return FULL_BLOCK*(eighths//8)+HORIZONTAL_EIGHTHS[eighths % 8].strip()
+
+def histogram(counts, edges, width):
+    """
+    Render a histogram with one horizontal bar per bin.
+
+    :param counts: Number of entries per bin.
+    :param edges: Edges of the bins, one more than counts.
+    :param width: Maximum width of lines.
+
+    :returns: List of lines.
+    """
+
+    labels = ["[{}, {})".format(format_number(lo), format_number(hi))
+              for lo, hi in zip(edges[:-1], edges[1:])]
+    if labels:
+        # last bin includes the upper edge
+        labels[-1] = labels[-1][:-1]+"]"
+    labelWidth = max((len(label) for label in labels), default=0)
+    countWidth = max((len(str(int(count))) for count in counts), default=0)
+    barWidth = max(width-labelWidth-countWidth-3, 1)
+
+    maxCount = max(counts, default=0)
+    return ["{:>{}} {:>{}} {}".format(label, labelWidth, int(count), countWidth,
+                                      hbar(count, maxCount, barWidth))
+            for label, count in zip(labels, counts)]
+
+def sparkline(values, low, high):
+    """
+    Render values as a single line with one character per value.
+    Values that are not finite are rendered as spaces.
+    """
+
+    chars = []
+    for value in values:
+        if not np.isfinite(value):
+            chars.append(" ")
+        elif high > low:
+            chars.append(VERTICAL_EIGHTHS[1+int(round((min(max(value, low), high)-low)
+                                                     /(high-low)*7))])
+        else:
+            chars.append(VERTICAL_EIGHTHS[4])
+    return "".join(chars)
+
+def envelope(mins, maxs, low, high, height):
+    """
+    Render the envelope of minimum and maximum values of columns.
+
+    :param mins: Minimum value of each column, inf for empty columns.
+    :param maxs: Maximum value of each column, -inf for empty columns.
+    :param low: Value at the bottom of the plot.
+    :param high: Value at the top of the plot.
+    :param height: Number of lines.
+
+    :returns: List of lines, top first.
+    """
+
+    # vertical extent of columns in eighths of a line from the bottom
+    columns = []
+    for mn, mx in zip(mins, maxs):
+        if mn > mx:
+            columns.append(None)
+            continue
+        if high > low:
+            bottom = (min(max(mn, low), high)-low)/(high-low)*height*8
+            top = (min(max(mx, low), high)-low)/(high-low)*height*8
+        else:
+            # constant, draw in the middle
+            bottom = top = height*4
+        # make even single values visible
+        if top-bottom < 1:
+            top = min(bottom+1, height*8)
+            bottom = top-1
+        columns.append((bottom, top))
+
+    lines = []
+    for row in reversed(range(height)):
+        chars = []
+        for column in columns:
+            if column is None:
+                chars.append(" ")
+                continue
+            # filled eighths of this cell
+            start = min(max(column[0]-8*row, 0), 8)
+            end = min(max(column[1]-8*row, 0), 8)
+            if end <= 0 or start >= 8:
+                chars.append(" ")
+            elif start < 1:
+                chars.append(VERTICAL_EIGHTHS[max(int(round(end)), 1)])
+            elif end >= 7:
+                # filled from the top
+                chars.append(FULL_BLOCK if start < 2 else "▀" if start < 6 else "▔")
+            else:
+                chars.append("▬")
+        lines.append("".join(chars))
+    return lines
+
+def summary(values):
+    """
+    Compute summary statistics of an array of numbers over its finite values.
+
+    :returns:
+        Dict with keys count, nan, inf, min, max, mean, std.
+        All but count, nan and inf are None if there are no finite values.
+    """
+
+    values = np.asarray(values).reshape(-1)
+    if values.dtype.kind == "b":
+        values = values.astype(np.uint8)
+    count = values.size
+    nan = inf = 0
+    if values.dtype.kind == "f":
+        nan = int(np.count_nonzero(np.isnan(values)))
+        inf = int(np.count_nonzero(np.isinf(values)))
+        if nan or inf:
+            values = values[np.isfinite(values)]
+
+    result = {"count": count, "nan": nan, "inf": inf,
+              "min": None, "max": None, "mean": None, "std": None}
+    if values.size:
+        result["min"] = values.min()
+        result["max"] = values.max()
+        result["mean"] = values.mean(dtype=np.float64)
+        result["std"] = values.std(dtype=np.float64)
+    return result
@@ -0,0 +1,171 @@
+"""
+Run scripts of shell commands non-interactively on many files.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import io
+import json
+import shlex
+import shutil
+import sys
+
+from h5sh.terminal import Terminal
+from h5sh.h5manager import H5Manager
+
+class CaptureTerminal(Terminal):
+    """
+    Terminal that records output instead of showing it.
+    Does not support input.
+    """
+
+    def __init__(self, width=80, colours=None):
+        """
+        :param width: Number of columns reported to commands.
+        :param colours: Terminal whose colour codes are used, colours are suppressed if None.
+        """
+
+        super(CaptureTerminal, self).__init__()
+        self._out = io.StringIO()
+        self._width = width
+        self._colours = colours
+
+    def get_input(self, prompt):
+        """No input is available, always returns 'exit'."""
+        return "exit"
+
+    def print(self, *args, **kwargs):
+        """Record something."""
+        print(*args, file=self._out, **kwargs)
+
+    def get_width(self):
+        """Return the number of columns given on construction."""
+        return self._width
+
+    def coloured(self, string, colour):
+        """Return string with colour codes of the terminal given on construction."""
+
+        if self._colours is None:
+            return string
+        return self._colours.coloured(string, colour)
+
+    def get_output(self):
+        """Return everything printed so far as a list of lines."""
+        return self._out.getvalue().splitlines()
+
+
+def split_script(script):
+    """
+    Split a script into commands separated by semicolons or newlines.
+    Separators inside quotes or escaped by a backslash do not count.
+    Quoting works like in the interactive shell.
+
+    :returns: List of commands, each a list of strings.
+    """
+
+    commands = []
+    current = []
+    quote = None
+    escaped = False
+    for char in script:
+        if escaped:
+            escaped = False
+        elif char == "\\" and quote != "'":
+            escaped = True
+        elif quote is not None:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in ";\n":
+            commands.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    commands.append("".join(current))
+
+    # split each command separately so that only ';' and newlines separate commands
+    return [args for args in (shlex.split(command) for command in commands) if args]
+
+def run_file(shellType, fname, script, managerOptions, width, term=None):
+    """
+    Run a script on one file. Executed in worker processes.
+
+    :param shellType: Class of the shell to execute commands with.
+    :param fname: Name of the HDF5 file.
+    :param script: List of commands as returned by split_script().
+    :param managerOptions: Dict of keyword arguments for H5Manager.
+    :param width: Number of columns of the output.
+    :param term: Terminal to show output on while running. Output is captured if None.
+
+    :returns:
+        Tuple of file name, list of captured output lines and error message or None.
+    """
+
+    capture = term is None
+    if capture:
+        term = CaptureTerminal(width)
+    try:
+        h5mngr = H5Manager(fname, background=False, **managerOptions)
+    except OSError as e:
+        return fname, [], str(e)
+    except Exception as e:
+        # a file that cannot be loaded must not abort the other files
+        return fname, [], "{}: {}".format(type(e).__name__, e)
+
+    error = None
+    try:
+        status = shellType(term).run_script(script, h5mngr)
+        if status != 0:
+            error = "exit status {}".format(status)
+    except Exception as e:
+        # keep going with the other files
+        error = "{}: {}".format(type(e).__name__, e)
+    finally:
+        h5mngr.close()
+    return fname, term.get_output() if capture else [], error
+
+def run_files(shellType, fnames, script, managerOptions, jobs=1, ndjson=False):
+    """
+    Run a script on many files in a process pool, each worker with its own
+    H5Manager, and print the results in the order of the files.
+    Output of each file is preceded by a header if there are several files.
+    Output of a single file is shown while the script runs, e.g. for tail -f.
+    With ndjson, a JSON object with keys file, output and error is printed per file.
+
+    :returns: Number of files for which the script failed.
+    """
+
+    width = shutil.get_terminal_size().columns
+    args = [(shellType, fname, script, managerOptions, width) for fname in fnames]
+
+    def results():
+        if len(fnames) == 1 and not ndjson:
+            yield run_file(*args[0], term=Terminal())
+            return
+        if jobs <= 1 or len(fnames) <= 1:
+            # no need to pay for starting processes
+            yield from (run_file(*arg) for arg in args)
+            return
+        with ProcessPoolExecutor(jobs) as executor:
+            try:
+                yield from executor.map(run_file, *zip(*args))
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    nfailed = 0
+    for i, (fname, lines, error) in enumerate(results()):
+        if ndjson:
+            print(json.dumps({"file": fname, "output": lines, "error": error}))
+        else:
+            if len(fnames) > 1:
+                if i > 0:
+                    print("")
+                print("==> {} <==".format(fname))
+            for line in lines:
+                print(line)
+            if error:
+                print("h5sh: {}: {}".format(fname, error), file=sys.stderr)
+        sys.stdout.flush()
+        nfailed += error is not None
+    return nfailed
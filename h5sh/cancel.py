@@ -0,0 +1,77 @@
+"""
+Cooperative cancellation of long running operations.
+"""
+
+import contextlib
+import signal
+import threading
+
+class Cancelled(Exception):
+    """Raised by CancelToken.check() when cancellation was requested."""
+    pass
+
+class CancelToken:
+    """
+    Flag to request cancellation of long running operations.
+
+    Operations call :func:`~cancel.CancelToken.check()` between chunks of work
+    and stop by raising :class:`~cancel.Cancelled` once :func:`~cancel.CancelToken.cancel()`
+    was called. The flag can be set from any thread or from a signal handler.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request cancellation."""
+        self._event.set()
+
+    def reset(self):
+        """Withdraw a request for cancellation."""
+        self._event.clear()
+
+    def is_cancelled(self):
+        """Return True if cancellation was requested."""
+        return self._event.is_set()
+
+    def check(self):
+        """
+        Check whether cancellation was requested.
+
+        :raises: Cancelled if it was.
+        """
+
+        if self._event.is_set():
+            raise Cancelled()
+
+    def wait(self, seconds):
+        """
+        Sleep for the given time or until cancellation is requested.
+
+        :raises: Cancelled if it was.
+        """
+
+        self._event.wait(seconds)
+        self.check()
+
+    @contextlib.contextmanager
+    def catch_interrupt(self):
+        """
+        Context manager that turns SIGINT (ctrl+c) into a cancellation request.
+        Pressing ctrl+c a second time raises KeyboardInterrupt for
+        operations that do not check the token.
+        The token is reset on entry and exit. Must be used from the main thread.
+        """
+
+        def handler(signum, frame):
+            if self._event.is_set():
+                raise KeyboardInterrupt()
+            self._event.set()
+
+        self.reset()
+        oldHandler = signal.signal(signal.SIGINT, handler)
+        try:
+            yield self
+        finally:
+            signal.signal(signal.SIGINT, oldHandler)
+            self.reset()
@@ -0,0 +1,106 @@
+"""
+Thin client to run commands in a running h5sh server (see server.py).
+
+Only uses the standard library so that starting it is fast.
+
+Protocol: The client sends one JSON object per connection with keys
+file (absolute path), either script (commands separated by ';' or newlines)
+or args (list of a command and its arguments), width (number of columns)
+and colour (bool). The server answers with one
+JSON object per line, {"out": text} for output and finally
+{"status": int} optionally with an additional key "error".
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+def default_socket_path():
+    """Return the path of the socket used by default, private to the current user."""
+
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+                        "h5sh-{}.sock".format(os.getuid()))
+
+def _add_options(parser):
+    """Add the options of h5shc to an argument parser."""
+
+    parser.add_argument("-c", "--command", metavar="SCRIPT",
+                        help="Commands separated by ';' or newlines")
+    parser.add_argument("-s", "--socket", default=default_socket_path(),
+                        help="Socket of the server (default: %(default)s)")
+
+def parse_args():
+    """
+    Parse command line arguments for h5shc.
+    Options may be given before or after FILE but not after a command.
+    """
+
+    parser = argparse.ArgumentParser(prog="h5shc",
+                                     description="""
+                                     Run h5sh commands in a running server started by
+                                     'h5sh --serve'. The server keeps recently used files
+                                     open and crawled, so commands return quickly.
+                                     """)
+    parser.add_argument("FILE", help="HDF5 file to run the commands on")
+    parser.add_argument("cmd", nargs=argparse.REMAINDER,
+                        help="Command and its arguments")
+    _add_options(parser)
+    args = parser.parse_args()
+
+    if args.cmd and args.cmd[0].startswith("-"):
+        # the remainder also swallows options after FILE, commands never start with '-'
+        options = argparse.ArgumentParser(prog="h5shc", add_help=False)
+        _add_options(options)
+        args.cmd = options.parse_known_args(args.cmd, namespace=args)[1]
+
+    if args.command is not None and args.cmd:
+        parser.error("cannot combine -c with a command: {}".format(" ".join(args.cmd)))
+    if args.command is None and not args.cmd:
+        parser.error("need a command or -c")
+    return args
+
+def main():
+    """Send a script to the server and print its output."""
+
+    args = parse_args()
+    # arguments are sent as they are to avoid quoting and splitting them again
+    request = {"script": args.command} if args.command is not None else {"args": args.cmd}
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(args.socket)
+    except OSError:
+        print("h5shc: no server at {}, start one with 'h5sh --serve'".format(args.socket),
+              file=sys.stderr)
+        sys.exit(2)
+
+    with sock, sock.makefile("rwb") as stream:
+        request.update({"file": os.path.abspath(args.FILE),
+                        "width": shutil.get_terminal_size().columns,
+                        "colour": sys.stdout.isatty()})
+        stream.write(json.dumps(request).encode("utf-8")+b"\n")
+        stream.flush()
+
+        status = 1
+        try:
+            for line in stream:
+                message = json.loads(line)
+                if "out" in message:
+                    sys.stdout.write(message["out"])
+                else:
+                    status = message["status"]
+                    if "error" in message:
+                        print("h5shc: {}".format(message["error"]), file=sys.stderr)
+        except KeyboardInterrupt:
+            # closing the connection stops the server from sending more
+            status = 130
+        except BrokenPipeError:
+            # output was closed, e.g. by head; avoid another error when flushing on exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(status)
+    sys.stdout.flush()
+    sys.exit(status)
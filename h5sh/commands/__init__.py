@@ -1,2 +1,5 @@
-__all__ = ["command", "ls", "cd", "pwd", "open_file", "run_external", "history", "show_help"]
-
+__all__ = ["command", "ls", "cd", "pwd", "open_file", "run_external", "history", "show_help",
+           "run_timed", "run_profiled", "show_stats", "tree", "diff",
+           "checksum", "chunks", "export", "head", "peek", "hist", "plot",
+           "count", "index", "query", "tail",
+           "watch", "where"]
@@ -0,0 +1,178 @@
+"""
+Module for checksum command.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+import multiprocessing
+import os
+
+from . import command
+
+from h5sh.h5data import digest_dataset, digest_datasets
+from h5sh.digests import DigestStore, file_identity
+
+class checksum(command.Command):
+    """Command to compute and verify digests of datasets."""
+
+    def __init__(self, digestFile):
+        """
+        :param digestFile: Name of the database to store digests in.
+        """
+
+        super(checksum, self).__init__()
+
+        self._parser = command.Command.Parser(prog="checksum",
+                                              description="Compute SHA-256 digests of datasets.\
+                                              Groups are processed recursively. Digests are\
+                                              stored and reused as long as the file does not change.\
+                                              Chunked datasets are hashed in their stored\
+                                              (compressed) form.")
+        self._parser.add_argument("item", nargs="*", default=["."],
+                                  help="Datasets or groups to process (the current group by default).")
+        self._parser.add_argument("--verify", action="store_true",
+                                  help="Compare against the most recent stored digests\
+                                  for this file name instead of printing digests.")
+        self._parser.add_argument("--no-cache", action="store_true",
+                                  help="Recompute digests even if the file did not change.")
+        self._parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                                  help="Number of processes (number of CPUs by default).")
+
+        self._digestFile = digestFile
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the checksum command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        datasets, addrs = _collect_datasets(h5mngr.get_items(wd, *pa.item), h5mngr)
+        if not datasets:
+            term.print("h5sh: checksum: no datasets found")
+            return
+
+        fname = h5mngr.get_file_name()
+        identity = file_identity(fname)
+        store = DigestStore(self._digestFile)
+        try:
+            spaths = ["/"+"/".join(path) for path in datasets]
+            if pa.verify:
+                # look up before storing new digests
+                references = [store.reference(fname, spath) for spath in spaths]
+
+            # reuse digests if the file did not change
+            digests = []
+            for addr in addrs:
+                h5mngr.check_cancelled()
+                digests.append(None if pa.no_cache else store.lookup(identity, addr))
+
+            nfailed = 0
+            todo = [i for i, digest in enumerate(digests) if digest is None]
+            try:
+                for i, digest in _compute(fname, datasets, todo, digests, pa.jobs, h5mngr):
+                    digests[i] = digest
+                    if pa.verify:
+                        nfailed += _print_verification(spaths[i], digest, references[i], term)
+                    else:
+                        term.print("{}  {}".format(digest, spaths[i]))
+            finally:
+                # keep everything that was computed, even if cancelled
+                store.store(identity, fname, ((addrs[i], spaths[i], digests[i])
+                                              for i in todo if digests[i] is not None))
+
+            if pa.verify:
+                term.print("{} datasets checked, {} failed".format(len(datasets), nfailed))
+
+        finally:
+            store.close()
+
+
+def _collect_datasets(pathsAndItems, h5mngr):
+    """
+    Find all datasets in or below given items without opening them.
+    Groups that are reached through links are not entered.
+
+    :returns: Tuple of sorted list of paths and list of the addresses of the datasets.
+    """
+
+    datasets = {}
+    for path, items in pathsAndItems:
+        for name, item in items.items():
+            if item.kind == item.Kind.dataset:
+                datasets[tuple(path+[name])] = item.addr
+            elif item.kind == item.Kind.group and item.target is None:
+                for gpath, children in h5mngr.walk(path+[name]):
+                    datasets.update((tuple(gpath+[n]), child.addr)
+                                    for n, child in children.items()
+                                    if child.kind == child.Kind.dataset)
+    paths = sorted(datasets)
+    return [list(path) for path in paths], [datasets[path] for path in paths]
+
+def _compute(fname, datasets, todo, digests, jobs, h5mngr):
+    """
+    Compute missing digests in a process pool.
+
+    :param datasets: List of paths of all datasets.
+    :param todo: Indices into datasets for which digests have to be computed.
+    :param digests: List of known digests, None for those that need to be computed.
+
+    :returns:
+        Generator of tuples of index and digest for all datasets, in order.
+    """
+
+    if jobs <= 1 or len(todo) <= 1:
+        # not worth starting processes
+        for i, path in enumerate(datasets):
+            if digests[i] is None:
+                yield i, digest_dataset(h5mngr.get_dataset(path), h5mngr.check_cancelled)
+            else:
+                yield i, digests[i]
+        return
+
+    # several datasets per task to open the file less often
+    nbatch = min(len(todo), 4*jobs)
+    batches = [todo[b::nbatch] for b in range(nbatch)]
+    futureOf = {}  # maps index to future and position in batch
+
+    # fork does not go well with threads and open HDF5 files
+    context = multiprocessing.get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=context)
+    try:
+        for batch in batches:
+            future = executor.submit(digest_datasets, fname,
+                                     ["/"+"/".join(datasets[i]) for i in batch])
+            for pos, i in enumerate(batch):
+                futureOf[i] = (future, pos)
+
+        for i in range(len(datasets)):
+            if digests[i] is not None:
+                yield i, digests[i]
+                continue
+
+            future, pos = futureOf[i]
+            while True:
+                h5mngr.check_cancelled()
+                try:
+                    result = future.result(timeout=0.1)
+                    break
+                except TimeoutError:
+                    pass
+            yield i, result[pos]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _print_verification(spath, digest, reference, term):
+    """
+    Print result of comparing digest with reference.
+
+    :returns: 1 if verification failed, 0 otherwise.
+    """
+
+    if reference is None:
+        term.print("{}: {}".format(spath, term.coloured("no reference", term.Colour.yellow)))
+        return 0
+    if digest == reference:
+        term.print("{}: {}".format(spath, term.coloured("OK", term.Colour.green)))
+        return 0
+    term.print("{}: {}".format(spath, term.coloured("FAILED", term.Colour.red)))
+    return 1
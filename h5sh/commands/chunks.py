@@ -0,0 +1,112 @@
+"""
+Module for chunks command.
+"""
+
+import numpy as np
+
+from . import command
+
+from h5sh.h5data import chunk_infos, filters, layout
+from h5sh.util import format_bytes
+
+# default size of the chunk cache of HDF5
+DEFAULT_CACHE_BYTES = 1024*1024
+
+class chunks(command.Command):
+    """Command to show how datasets are chunked and compressed."""
+
+    def __init__(self):
+        super(chunks, self).__init__()
+
+        self._parser = command.Command.Parser(prog="chunks",
+                                              description="Show chunking, filters and statistics\
+                                              of stored chunks of datasets.\
+                                              No data is read or decompressed.")
+        self._parser.add_argument("item", nargs="+",
+                                  help="Dataset(s) to inspect.")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the chunks command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        first = True
+        for path, items in h5mngr.get_items(wd, *pa.item):
+            for name, item in sorted(items.items()):
+                if item.kind != item.Kind.dataset:
+                    continue
+                h5mngr.check_cancelled()
+                dset = h5mngr.get_dataset(path+[name])
+                if dset is None:
+                    continue
+
+                if not first:
+                    term.print("")
+                first = False
+
+                term.print("/"+"/".join(path+[name]))
+                for key, value in _inspect(dset, term):
+                    term.print("  {:<12s} {}".format(key, value))
+
+        if first:
+            term.print("h5sh: chunks: no datasets found")
+
+
+def _inspect(dset, term):
+    """Generate tuples of keys and values describing storage of a dataset."""
+
+    if dset.shape is None:
+        yield "layout", "no dataspace"
+        return
+
+    logical = dset.size*dset.dtype.itemsize
+    stored = dset.id.get_storage_size()
+
+    if not dset.chunks:
+        yield "layout", layout(dset)
+        yield "size", "{} ({} stored)".format(format_bytes(logical), format_bytes(stored))
+        return
+
+    yield "layout", "chunked"
+    chunkBytes = int(np.prod(dset.chunks, dtype=np.int64))*dset.dtype.itemsize
+    yield "chunk shape", "{{{}}}  ({})".format(", ".join(str(x) for x in dset.chunks),
+                                               format_bytes(chunkBytes))
+    yield "filters", ", ".join(_format_filter(*f) for f in filters(dset)) or "none"
+
+    total = int(np.prod([-(-n//c) for n, c in zip(dset.shape, dset.chunks)], dtype=np.int64))
+    infos = chunk_infos(dset)
+    if infos is None:
+        yield "chunks", "{} in dataspace (allocated chunks cannot be queried)".format(total)
+        yield "stored size", format_bytes(stored)
+        return
+
+    yield "chunks", "{} allocated of {}".format(len(infos), total)
+    if infos:
+        sizes = np.array([info.size for info in infos], dtype=np.int64)
+        yield "stored size", "{} for {} in allocated chunks (ratio {:.2f})".format(
+            format_bytes(int(sizes.sum())), format_bytes(len(infos)*chunkBytes),
+            len(infos)*chunkBytes/max(int(sizes.sum()), 1))
+        yield "chunk sizes", "min {}  median {}  mean {}  max {}".format(
+            format_bytes(int(sizes.min())), format_bytes(int(np.median(sizes))),
+            format_bytes(int(sizes.mean())), format_bytes(int(sizes.max())))
+
+    # point out common problems
+    if chunkBytes > DEFAULT_CACHE_BYTES:
+        yield "warning", term.coloured("chunks do not fit into the default chunk cache ({})"
+                                       .format(format_bytes(DEFAULT_CACHE_BYTES)),
+                                       term.Colour.yellow)
+    if chunkBytes < 4096 and total > 1:
+        yield "warning", term.coloured("chunks are very small, reading causes a lot of overhead",
+                                       term.Colour.yellow)
+
+def _format_filter(code, name, values):
+    """Format a filter for output."""
+
+    if name == "deflate" and values:
+        return "deflate (level {})".format(values[0])
+    if name in ("shuffle", "fletcher32", "lzf"):
+        return name
+    return "{} ({}{})".format(name or "filter", code,
+                              ": "+", ".join(str(v) for v in values) if values else "")
@@ -0,0 +1,53 @@
+"""
+Module for count command.
+"""
+
+from posixpath import normpath
+
+from . import command
+
+from h5sh.util import abspath, format_bytes, split_path
+
+class count(command.Command):
+    """Command to count items below groups."""
+
+    def __init__(self):
+        super(count, self).__init__()
+
+        self._parser = command.Command.Parser(prog="count",
+                                              description="Count groups, datasets, links and\
+                                              dangling soft links below groups and sum up the\
+                                              logical size of all datasets. Linked groups are\
+                                              not entered. Counts are collected while crawling\
+                                              the file, so this is immediate once the crawl\
+                                              has finished.")
+        self._parser.add_argument("item", nargs="*", default=["."],
+                                  help="Group(s) to count (the current group by default).")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the count command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        rows = []
+        for name in pa.item:
+            path = abspath(wd, [e for e in split_path(normpath(name)) if e])
+            counts = h5mngr.get_counts(path)
+            if counts is None:
+                term.print("h5sh: count: {}: No such group".format(name))
+                continue
+            rows.append([str(counts.groups), str(counts.datasets), str(counts.links),
+                         str(counts.dangling), format_bytes(counts.nbytes),
+                         "/"+"/".join(path)])
+
+        if not rows:
+            return
+        header = ["groups", "datasets", "links", "dangling", "size", "path"]
+        widths = [max(len(row[i]) for row in rows+[header]) for i in range(len(header)-1)]
+        lines = ["  ".join("{:>{}}".format(field, width) for field, width in zip(row, widths))
+                 +"  "+row[-1] for row in [header]+rows]
+        term.print(term.coloured(lines[0], term.Colour.iblack))
+        for line in lines[1:]:
+            term.print(line)
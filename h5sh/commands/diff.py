@@ -0,0 +1,200 @@
+"""
+Module for diff command.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from posixpath import normpath
+import os
+
+from . import command
+
+from h5sh.h5manager import H5Manager
+from h5sh.h5data import hash_dataset
+from h5sh.util import split_path, abspath
+
+class diff(command.Command):
+    """Command to compare the structure of two groups."""
+
+    def __init__(self):
+        super(diff, self).__init__()
+
+        self._parser = command.Command.Parser(prog="diff",
+                                              description="Compare two groups by names, kinds, shapes,\
+                                              dtypes and link targets of their items.\
+                                              Groups can be in different files.")
+        self._parser.add_argument("first",
+                                  help="First group. Use FILE//PATH for a group in another file.")
+        self._parser.add_argument("second",
+                                  help="Second group. Use FILE//PATH for a group in another file.")
+        self._parser.add_argument("-c", "--content", action="store_true",
+                                  help="Also compare the contents of datasets.")
+        self._parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                                  help="Number of threads for comparing contents\
+                                  (number of CPUs by default).")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the diff command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        h5mngr.refresh()
+        managers = []  # managers opened for this command
+        try:
+            first = _resolve(pa.first, wd, h5mngr, managers, term)
+            second = _resolve(pa.second, wd, h5mngr, managers, term)
+            if not first or not second:
+                return
+
+            ndiff = 0
+            candidates = []  # datasets that need to be compared by content
+            for kind, path, detail in _compare(first, second, [], h5mngr):
+                if kind == "same":
+                    candidates.append(path)
+                else:
+                    ndiff += 1
+                    term.print(_format(kind, path, detail, term))
+
+            if pa.content and candidates:
+                ndiff += _compare_contents(first, second, candidates, pa.jobs, h5mngr, term)
+
+            if ndiff == 0:
+                term.print("no differences")
+
+        finally:
+            for mngr in managers:
+                mngr.close()
+
+
+def _resolve(spec, wd, h5mngr, managers, term):
+    """
+    Find the group specified on the command line.
+
+    :returns:
+        Tuple of manager and path or None if there is no such group.
+    """
+
+    if "//" in spec:
+        # group in another file
+        fname, spath = spec.split("//", 1)
+        try:
+            mngr = H5Manager(fname)
+        except OSError:
+            term.print("h5sh: diff: {}: Could not open file".format(fname))
+            return None
+        managers.append(mngr)
+        path = [e for e in split_path(normpath("/"+spath)) if e and e != "/"]
+    else:
+        mngr = h5mngr
+        path = abspath(wd, [e for e in split_path(normpath(spec)) if e])
+
+    if mngr.get_children(path) is None:
+        term.print("h5sh: diff: {}: No such group".format(spec))
+        return None
+    return mngr, path
+
+def _compare(first, second, relpath, h5mngr):
+    """
+    Compare two groups recursively.
+
+    :param first: Tuple of manager and path of first group.
+    :param second: Tuple of manager and path of second group.
+    :param relpath: Path relative to both groups that is compared in this call.
+
+    :returns:
+        Generator of tuples (kind, path, detail) where kind describes the difference
+        and path is relative to both groups. Datasets that are equal as far as
+        the structure is concerned are reported with kind 'same'.
+    """
+
+    h5mngr.check_cancelled()
+
+    kidsA = first[0].get_children(first[1]+relpath)
+    kidsB = second[0].get_children(second[1]+relpath)
+
+    for name in sorted(kidsA.keys() | kidsB.keys()):
+        path = relpath+[name]
+        a = kidsA.get(name)
+        b = kidsB.get(name)
+
+        if b is None:
+            yield "only first", path, None
+        elif a is None:
+            yield "only second", path, None
+        elif a.kind != b.kind:
+            yield "kind", path, (a.kind.name, b.kind.name)
+        elif a.kind == a.Kind.group and (a.target is not None or b.target is not None):
+            # groups reached through links are compared as links, not entered
+            if a.target != b.target:
+                yield "target", path, (_format_target(a), _format_target(b))
+        elif a.kind == a.Kind.group:
+            yield from _compare(first, second, path, h5mngr)
+        elif a.kind == a.Kind.datatype:
+            if a.dtype != b.dtype:
+                yield "dtype", path, (str(a.dtype), str(b.dtype))
+        elif a.kind == a.Kind.dataset:
+            if a.shape != b.shape:
+                yield "shape", path, (_format_shape(a.shape), _format_shape(b.shape))
+            elif a.dtype != b.dtype:
+                yield "dtype", path, (str(a.dtype), str(b.dtype))
+            else:
+                yield "same", path, None
+        elif a.target != b.target or a.dangling != b.dangling:
+            yield "target", path, (_format_target(a), _format_target(b))
+
+def _compare_contents(first, second, paths, jobs, h5mngr, term):
+    """
+    Compare contents of datasets by hashing them in a thread pool.
+    Prints differences as they are found.
+
+    :returns: Number of datasets with different contents.
+    """
+
+    def hash_pair(path):
+        hashes = []
+        for mngr, base in (first, second):
+            dset = mngr.get_dataset(base+path)
+            hashes.append(hash_dataset(dset, h5mngr.check_cancelled) if dset else None)
+        return hashes[0] != hashes[1]
+
+    ndiff = 0
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        futures = [executor.submit(hash_pair, path) for path in paths]
+        try:
+            # report in order of paths
+            for path, future in zip(paths, futures):
+                h5mngr.check_cancelled()
+                if future.result():
+                    ndiff += 1
+                    term.print(_format("content", path, None, term))
+        finally:
+            for future in futures:
+                future.cancel()
+    return ndiff
+
+def _format(kind, path, detail, term):
+    """Format a difference for printing."""
+
+    spath = "/".join(path)
+    if kind == "only first":
+        return term.coloured("- ", term.Colour.red)+spath
+    if kind == "only second":
+        return term.coloured("+ ", term.Colour.green)+spath
+    if kind == "content":
+        return term.coloured("~ ", term.Colour.yellow)+spath+"  content differs"
+    return term.coloured("~ ", term.Colour.yellow)+spath \
+        +"  {}: {} != {}".format(kind, detail[0], detail[1])
+
+def _format_shape(shape):
+    """Format shape like ls -l."""
+    return "{"+", ".join(str(x) for x in shape)+"}" if shape is not None else "{}"
+
+def _format_target(item):
+    """Format target of a link, including groups reached through links."""
+
+    if item.target is None:
+        return "(no link)"
+    target = item.target if isinstance(item.target, str) \
+             else item.target[0]+"//"+item.target[1]
+    return target+" (dangling)" if item.dangling else target
@@ -0,0 +1,199 @@
+"""
+Module for export command.
+"""
+
+from posixpath import normpath
+import os
+import tempfile
+
+import numpy as np
+
+from . import command
+
+from h5sh.h5data import iter_selection_blocks, read_blocks, read_selection, selection_shape
+from h5sh.util import abspath, format_bytes, parse_selection, split_path, split_selection
+
+FORMATS = ("npy", "csv", "raw")
+
+class export(command.Command):
+    """Command to write (parts of) datasets to files."""
+
+    def __init__(self):
+        super(export, self).__init__()
+
+        self._parser = command.Command.Parser(prog="export",
+                                              description="Write a dataset or a part of it to a file.\
+                                              Data is streamed in chunk-aligned blocks, so memory usage\
+                                              is bounded regardless of the size of the dataset.")
+        self._parser.add_argument("item",
+                                  help="Dataset to export, optionally with a selection like\
+                                  'data[0:100, 5]'. Quote the item to protect spaces in\
+                                  the selection.")
+        self._parser.add_argument("output",
+                                  help="Name of the output file.")
+        self._parser.add_argument("--format", choices=FORMATS,
+                                  help="Output format. Deduced from the extension of the output\
+                                  file by default (.npy, .csv, anything else is raw).")
+        self._parser.add_argument("-f", "--force", action="store_true",
+                                  help="Overwrite the output file if it exists.")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the export command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        spath, sselection = split_selection(pa.item)
+        dset = h5mngr.get_dataset(abspath(wd, [e for e in split_path(normpath(spath)) if e]))
+        if dset is None:
+            term.print("h5sh: export: {}: No such dataset".format(spath))
+            return
+        if dset.shape is None:
+            term.print("h5sh: export: {}: Dataset has no dataspace".format(spath))
+            return
+
+        try:
+            slices, dropped = parse_selection(sselection, dset.shape)
+        except ValueError as e:
+            term.print("h5sh: export: {}: {}".format(pa.item, e))
+            return
+
+        fmt = pa.format or _format_from_name(pa.output)
+        if fmt != "csv" and dset.dtype.hasobject:
+            term.print("h5sh: export: {}: Variable length data can only be exported to csv"
+                       .format(spath))
+            return
+        if os.path.exists(pa.output) and not pa.force:
+            term.print("h5sh: export: {}: File exists, use -f to overwrite".format(pa.output))
+            return
+
+        writer = {"npy": _write_npy, "csv": _write_csv, "raw": _write_raw}[fmt]
+        # an existing file is only replaced once the export is complete
+        tmp = None
+        try:
+            tmp = _temporary_file(pa.output)
+            shape = writer(dset, slices, dropped, tmp, h5mngr.check_cancelled)
+            os.replace(tmp, pa.output)
+        except OSError as e:
+            _remove(tmp)
+            term.print("h5sh: export: {}: {}".format(pa.output, e.strerror or e))
+            return
+        except BaseException:
+            # do not leave incomplete files behind
+            _remove(tmp)
+            raise
+
+        term.print("wrote {{{}}} {} ({}) to {}".format(
+            ", ".join(str(x) for x in shape), dset.dtype,
+            format_bytes(os.path.getsize(pa.output)), pa.output))
+
+
+def _format_from_name(fname):
+    """Return output format according to the extension of a file name."""
+
+    ext = os.path.splitext(fname)[1].lower()
+    return {".npy": "npy", ".csv": "csv"}.get(ext, "raw")
+
+def _output_shape(slices, dropped):
+    """Return shape of the selection without dimensions selected by integers."""
+    return tuple(n for n, drop in zip(selection_shape(slices), dropped) if not drop)
+
+def _write_npy(dset, slices, dropped, fname, check):
+    """
+    Write selection to a .npy file.
+    Data is read directly into a memory map of the output file without any buffer.
+
+    :returns: Shape of the written array.
+    """
+
+    shape = _output_shape(slices, dropped)
+    out = np.lib.format.open_memmap(fname, mode="w+", dtype=dset.dtype, shape=shape)
+    try:
+        if not slices:
+            read_selection(dset, slices, out=out)
+        elif out.size > 0:
+            # view with dropped dimensions of length 1 as expected by read_direct
+            full = out.reshape(selection_shape(slices))
+            for source, start, stop in iter_selection_blocks(dset, slices):
+                check()
+                read_selection(dset, list(source), check=check, out=full[start:stop])
+        out.flush()
+    finally:
+        del out
+    return shape
+
+def _write_raw(dset, slices, dropped, fname, check):
+    """
+    Write selection as raw bytes in C order using the byte order of the dataset.
+
+    :returns: Shape of the written array.
+    """
+
+    with open(fname, "wb") as f:
+        for _, _, block in read_blocks(dset, slices, check):
+            f.write(block.data)
+    return _output_shape(slices, dropped)
+
+def _write_csv(dset, slices, dropped, fname, check):
+    """
+    Write selection as CSV with one row per element along the first output dimension.
+    Further dimensions are flattened into columns. Compound datasets get a header
+    with the names of their fields.
+
+    :returns: Shape of the written array.
+    """
+
+    shape = _output_shape(slices, dropped)
+    fmt = _csv_format(dset.dtype)
+    header = ",".join(dset.dtype.names) if dset.dtype.names else ""
+
+    with open(fname, "w") as f:
+        if header:
+            f.write(header+"\n")
+        for _, _, block in read_blocks(dset, slices, check):
+            block = block.reshape((-1,)+shape[1:]) if shape else block.reshape(1)
+            if block.dtype.names:
+                block = block.reshape(-1)
+            elif block.ndim > 2:
+                block = block.reshape(block.shape[0], -1)
+            np.savetxt(f, block, fmt=fmt, delimiter=",")
+    return shape
+
+def _csv_format(dtype):
+    """Return a format for np.savetxt suitable for given dtype."""
+
+    if dtype.names:
+        return [_csv_format(dtype[name]) for name in dtype.names]
+    if dtype.kind in "iub":
+        return "%d"
+    if dtype.kind == "f":
+        # enough digits to restore the value
+        return "%.17g"
+    return "%s"
+
+def _temporary_file(fname):
+    """
+    Create an empty file in the directory of fname to write to before renaming it
+    to fname. It gets the permissions of a newly created file.
+
+    :returns: Name of the temporary file.
+    """
+
+    fd, tmp = tempfile.mkstemp(prefix="."+os.path.basename(fname)+".", suffix=".tmp",
+                               dir=os.path.dirname(os.path.abspath(fname)))
+    os.close(fd)
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(tmp, 0o666 & ~umask)
+    return tmp
+
+def _remove(fname):
+    """Remove a file if it exists. Does nothing if fname is None."""
+
+    if fname is None:
+        return
+    try:
+        os.remove(fname)
+    except OSError:
+        pass
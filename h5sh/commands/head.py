@@ -0,0 +1,154 @@
+"""
+Module for head command.
+"""
+
+from posixpath import normpath
+import sys
+
+import numpy as np
+
+from . import command
+
+from h5sh.util import abspath, parse_selection, split_path, split_selection
+
+class head(command.Command):
+    """Command to print the first elements of datasets."""
+
+    def __init__(self):
+        super(head, self).__init__()
+
+        self._parser = command.Command.Parser(prog="head",
+                                              description="Print the first elements of datasets\
+                                              along their first axis. Chunks are cached between\
+                                              commands, so reading nearby parts of a compressed\
+                                              dataset again is fast.")
+        self._parser.add_argument("item", nargs="+",
+                                  help="Datasets to print, optionally with a selection like\
+                                  'data[100:200, 5]'.")
+        self._parser.add_argument("-n", "--lines", type=int, default=10,
+                                  help="Number of elements to print along the first axis\
+                                  (default: 10).")
+        self._parser.add_argument("--fields",
+                                  help="Comma separated names of fields of compound datasets\
+                                  to print, e.g. 't,energy'. Only these fields are read.")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the head command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        fields = [f.strip() for f in pa.fields.split(",") if f.strip()] \
+            if pa.fields is not None else None
+
+        for i, spec in enumerate(pa.item):
+            spath, sselection = split_selection(spec)
+            path = abspath(wd, [e for e in split_path(normpath(spath)) if e])
+            dset = h5mngr.get_dataset(path)
+            if dset is None:
+                term.print("h5sh: head: {}: No such dataset".format(spath))
+                continue
+            if dset.shape is None:
+                term.print("h5sh: head: {}: Dataset has no dataspace".format(spath))
+                continue
+
+            if fields is not None:
+                if not dset.dtype.names:
+                    term.print("h5sh: head: {}: Not a compound dataset".format(spath))
+                    continue
+                missing = [f for f in fields if f not in dset.dtype.names]
+                if missing or not fields:
+                    term.print("h5sh: head: {}: No such field '{}'".format(
+                        spath, missing[0] if missing else ""))
+                    continue
+
+            try:
+                slices, dropped = parse_selection(sselection, dset.shape)
+            except ValueError as e:
+                term.print("h5sh: head: {}: {}".format(spec, e))
+                continue
+
+            if len(pa.item) > 1:
+                if i > 0:
+                    term.print("")
+                term.print("==> /{} <==".format("/".join(path)))
+
+            axis = dropped.index(False) if False in dropped else None
+            if axis is not None:
+                # only read what is printed
+                s = slices[axis]
+                slices[axis] = slice(s.start, min(s.stop, s.start+max(pa.lines, 0)*s.step), s.step)
+
+            if fields is not None:
+                columns = h5mngr.read_fields(path, slices, fields)
+                columns = {name: data.reshape([n for n, drop in zip(data.shape, dropped)
+                                               if not drop]+list(data.shape[len(dropped):]))
+                           for name, data in columns.items()}
+                print_fields(columns, slices[axis] if axis is not None else None, term)
+                continue
+
+            data = h5mngr.read_selection(path, slices)
+            data = data.reshape([n for n, drop in zip(data.shape, dropped) if not drop])
+            print_data(data, slices[axis] if axis is not None else None, term)
+
+
+def print_data(data, indexSlice, term):
+    """
+    Print an array row by row, labelling rows by their index in the dataset.
+    Also used by tail.
+
+    :param indexSlice: Slice that selected the rows or None if data has no rows.
+    """
+
+    width = term.get_width()
+    if indexSlice is None:
+        term.print(_format_array(data, width))
+        return
+
+    indices = range(indexSlice.start, indexSlice.stop, indexSlice.step)
+    labelWidth = len(str(indices[-1])) if len(indices) > 0 else 0
+    for index, row in zip(indices, data):
+        lines = _format_array(np.asarray(row), width-labelWidth-2).split("\n")
+        term.print("{:>{}}  {}".format(index, labelWidth, lines[0]))
+        for line in lines[1:]:
+            term.print(" "*(labelWidth+2)+line)
+
+def print_fields(columns, indexSlice, term):
+    """
+    Print fields of a compound dataset as a table with one column per field
+    and rows labelled by their index in the dataset.
+
+    :param columns: Dict of field name to array as returned by h5data.read_fields().
+    :param indexSlice: Slice that selected the rows or None if there are no rows.
+    """
+
+    names = list(columns)
+    cellWidth = max(term.get_width()//(len(names)+1), 8)
+    if indexSlice is None:
+        nameWidth = max(len(name) for name in names)
+        for name in names:
+            text = _format_array(columns[name], term.get_width()-nameWidth-2)
+            term.print("{:<{}}  {}".format(name, nameWidth, text.replace("\n", " ")))
+        return
+
+    indices = range(indexSlice.start, indexSlice.stop, indexSlice.step)
+    rows = [[str(index)]+[_format_array(np.asarray(columns[name][i]), cellWidth).replace("\n", " ")
+                          for name in names]
+            for i, index in enumerate(indices)]
+    widths = [max(len(row[j]) for row in [[""]+names]+rows) for j in range(len(names)+1)]
+    for row in [[""]+names]+rows:
+        term.print("  ".join("{:>{}}".format(cell, width) for cell, width in zip(row, widths)))
+
+def _format_array(data, width):
+    """Format an array, leaving out elements in the middle if it does not fit into width."""
+
+    for edgeitems in (None, 3, 2, 1):
+        if edgeitems is None:
+            text = np.array2string(data, max_line_width=sys.maxsize, threshold=sys.maxsize)
+        else:
+            text = np.array2string(data, max_line_width=sys.maxsize, threshold=0,
+                                   edgeitems=edgeitems)
+        if max(len(line) for line in text.split("\n")) <= width:
+            break
+    return text
@@ -0,0 +1,61 @@
+"""
+Module for hist command.
+"""
+
+from posixpath import normpath
+
+from . import command
+
+from h5sh.asciiplot import histogram as render_histogram
+from h5sh.h5data import histogram, value_range
+from h5sh.util import abspath, parse_selection, split_path, split_selection
+
+class hist(command.Command):
+    """Command to show a histogram of the values of a dataset."""
+
+    def __init__(self):
+        super(hist, self).__init__()
+
+        self._parser = command.Command.Parser(prog="hist",
+                                              description="Show a histogram of all finite values\
+                                              of a numeric dataset. The dataset is read block by\
+                                              block, so it does not need to fit into memory.")
+        self._parser.add_argument("item",
+                                  help="Dataset, optionally with a selection like 'data[:, 5]'.")
+        self._parser.add_argument("--bins", type=int, default=20,
+                                  help="Number of bins (default: 20).")
+        self._parser.add_argument("--range", type=float, nargs=2, metavar=("LOW", "HIGH"),
+                                  help="Range of the histogram. Determined from the data\
+                                  by default which requires an additional pass.")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the hist command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        spath, sselection = split_selection(pa.item)
+        dset = h5mngr.get_dataset(abspath(wd, [e for e in split_path(normpath(spath)) if e]))
+        if dset is None:
+            term.print("h5sh: hist: {}: No such dataset".format(spath))
+            return
+        if dset.shape is None or dset.dtype.kind not in "biuf":
+            term.print("h5sh: hist: {}: Not a numeric dataset".format(spath))
+            return
+        try:
+            slices, _ = parse_selection(sselection, dset.shape)
+        except ValueError as e:
+            term.print("h5sh: hist: {}: {}".format(pa.item, e))
+            return
+
+        valueRange = pa.range or value_range(dset, slices, h5mngr.check_cancelled)
+        if valueRange is None:
+            term.print("h5sh: hist: {}: No finite values".format(pa.item))
+            return
+        bins = max(pa.bins, 1) if valueRange[1] > valueRange[0] else 1
+
+        counts, edges = histogram(dset, slices, bins, valueRange, h5mngr.check_cancelled)
+        for line in render_histogram(counts, edges, term.get_width()):
+            term.print(line)
+        term.print("{} values in range".format(counts.sum()))
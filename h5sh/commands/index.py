@@ -0,0 +1,113 @@
+"""
+Module for index command.
+"""
+
+import itertools
+
+import numpy as np
+
+from . import command
+
+from h5sh.digests import file_identity
+from h5sh.metaindex import MetadataIndex, attribute_row
+
+class index(command.Command):
+    """Command to store the metadata of the file in an SQLite database."""
+
+    def __init__(self, indexFile):
+        """
+        :param indexFile: Name of the database to store the index in.
+        """
+
+        super(index, self).__init__()
+
+        self._parser = command.Command.Parser(prog="index",
+                                              description="Store path, kind, shape, dtype,\
+                                              size and link target of all items of the file\
+                                              in an SQLite database which can be searched\
+                                              with 'query'. The index is kept across sessions\
+                                              and only rebuilt when the file has changed.")
+        self._parser.add_argument("-a", "--attributes", action="store_true",
+                                  help="Also store attributes of all objects.")
+        self._parser.add_argument("-f", "--force", action="store_true",
+                                  help="Rebuild the index even if the file did not change.")
+
+        self._indexFile = indexFile
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the index command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        fname = h5mngr.get_file_name()
+        identity = file_identity(fname)
+        store = MetadataIndex(self._indexFile)
+        try:
+            state = store.state(fname)
+            if not pa.force and state is not None and state[0] == identity \
+               and (state[1] or not pa.attributes):
+                term.print("index is up to date")
+                return
+
+            h5mngr.refresh()
+            nitems, nattributes = store.replace(
+                fname, identity, _item_rows(h5mngr),
+                _attribute_rows(h5mngr) if pa.attributes else None,
+                h5mngr.check_cancelled)
+            term.print("indexed {} items".format(nitems)
+                       +(" and {} attributes".format(nattributes) if pa.attributes else ""))
+        finally:
+            store.close()
+
+
+def _all_items(h5mngr):
+    """
+    Generate tuples of path and item for all items in the file.
+    Groups that are reached through links are not entered.
+    """
+
+    for path, children in h5mngr.walk([]):
+        for name, item in sorted(children.items()):
+            yield path+[name], item
+
+def _format_target(target):
+    """Format the target of a link for the index."""
+
+    if target is None or isinstance(target, str):
+        return target
+    return target[0]+"//"+target[1]
+
+def _item_rows(h5mngr):
+    """Generate rows of the items table for all items in the file."""
+
+    yield "/", None, "", "group", None, None, None, None, None, None, None, None
+    for path, item in _all_items(h5mngr):
+        shape = ndim = size = dtype = itemsize = nbytes = None
+        if item.kind in (item.Kind.dataset, item.Kind.datatype):
+            if item.shape is not None:
+                shape = ",".join(str(n) for n in item.shape)
+                ndim = len(item.shape)
+                size = int(np.prod(item.shape, dtype=np.int64))
+            if item.dtype is not None:
+                dtype = str(item.dtype)
+                itemsize = item.dtype.itemsize
+                if size is not None:
+                    nbytes = size*itemsize
+        yield ("/"+"/".join(path), "/"+"/".join(path[:-1]), path[-1], item.kind.name,
+               shape, ndim, size, dtype, itemsize, nbytes,
+               _format_target(item.target), item.dangling)
+
+def _attribute_rows(h5mngr):
+    """Generate rows of the attributes table for all objects in the file."""
+
+    for path, item in itertools.chain([([], None)], _all_items(h5mngr)):
+        if item is not None and (item.kind not in (item.Kind.group, item.Kind.dataset,
+                                                   item.Kind.datatype)
+                                 or item.target is not None):
+            # links are not objects themselves
+            continue
+        h5mngr.check_cancelled()
+        for name, value in h5mngr.get_attributes(path) or ():
+            yield attribute_row("/"+"/".join(path), name, value)
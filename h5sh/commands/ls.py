@@ -4,7 +4,7 @@ Module for ls command.
 
 from . import command
 
-from h5sh.util import table_layout
+from h5sh.util import format_bytes, table_layout
 
 class ls(command.Command):
     """Command to list items"""
@@ -17,6 +17,8 @@ class ls(command.Command):
         self._parser.add_argument("item", nargs="*", default=["."],
                                   help="Item(s) to list  (the current group by default).")
         self._parser.add_argument("-l", help="show extra information", action="store_true")
+        self._parser.add_argument("--fields", action="store_true",
+                                  help="show the fields of compound datasets, implies -l")
 
     def __call__(self, args, wd, h5mngr, term):
         """Execute the ls command."""
@@ -31,6 +33,8 @@ class ls(command.Command):
         printGroupNames = len(pathsAndItems) > 1
         first = True
         for path, items in pathsAndItems:
+            h5mngr.check_cancelled()
+
             if not path:
                 path = ["/"]
 
@@ -42,8 +46,8 @@ class ls(command.Command):
                 if printGroupNames:
                     term.print("/".join(path)+"/:")
 
-                if pa.l:
-                    _print_list(items, term)
+                if pa.l or pa.fields:
+                    _print_list(items, term, pa.fields)
                 else:
                     _print_plain(items, term)
 
@@ -66,13 +70,27 @@ def _print_plain(items, term):
                                   +" "*(widths[i][j]-nameLens[j*nrow+i]) # fill in space
                                   for j in range(len(widths[i]))))
 
-def _print_list(items, term):
-    """Print detailed list of H5 items, one item per row."""
+def _print_list(items, term, fields=False):
+    """
+    Print detailed list of H5 items, one item per row.
+    If fields is True, the fields of compound datasets are listed below them.
+    """
 
     nameStrs, nameLens, details = _compile_data(items, term)
     maxNameLen = max(nameLens)
-    for i in range(len(nameStrs)):
+    for i, (_, item) in enumerate(sorted(items.items())):
         term.print(nameStrs[i]+" "*(maxNameLen-nameLens[i])+details[i])
+        if fields and item.kind == item.Kind.dataset and item.dtype is not None \
+           and item.dtype.names:
+            _print_fields(item.dtype, term)
+
+def _print_fields(dtype, term):
+    """Print names and types of the fields of a compound type, one per row."""
+
+    nameLen = max(len(name) for name in dtype.names)
+    for name in dtype.names:
+        term.print("  "+term.coloured("{:<{}}".format(name, nameLen), term.Colour.iblack)
+                   +"  "+format_dtype(dtype[name]))
 
 def _compile_data(items, term):
     """
@@ -91,20 +109,22 @@ def _compile_data(items, term):
 
     # build lists
     for name, item in sorted(items.items()):
+        nameStr, nameLen = format_name(name, item, term)
         if item.kind == item.Kind.dataset:
-            nameStr, nameLen = _format_dataset_name(name, term)
-            detail = "      {"+", ".join(str(x) for x in item.shape) \
-                     +"} ("+str(item.dtype)+")"
+            detail = "      {"+", ".join(str(x) for x in item.shape or ()) \
+                     +"} ("+format_dtype(item.dtype)+")"
         elif item.kind == item.Kind.group:
-            nameStr, nameLen = _format_group_name(name, term)
             detail = ""
+            if item.counts is not None:
+                # only show counts already known from crawling
+                detail = "      "+term.coloured("{} groups, {} datasets, {}".format(
+                    item.counts.groups, item.counts.datasets,
+                    format_bytes(item.counts.nbytes)), term.Colour.iblack)
         elif item.kind == item.Kind.softLink:
-            nameStr, nameLen = _format_softlink_name(name, term, item.dangling)
             detail = "  ->  "+item.target
             if item.dangling:
                 detail += "  "+term.coloured("dangling", term.Colour.red)
         elif item.kind == item.Kind.externalLink:
-            nameStr, nameLen = _format_externallink_name(name, term, item.dangling)
             detail = "  ->  "+term.coloured(item.target[0], term.Colour.iwhite) \
                      +"//"+item.target[1]
             if item.dangling:
@@ -113,8 +133,10 @@ def _compile_data(items, term):
                     detail += "  "+term.coloured("dangling (object)", term.Colour.red)
                 else:
                     detail += "  "+term.coloured("dangling (file)", term.Colour.red)
-        elif item.kind == item.Kind.hardLink:
-            raise NotImplementedError()  # TODO
+        elif item.kind == item.Kind.datatype:
+            detail = "      (named datatype "+format_dtype(item.dtype)+")"
+        else:
+            detail = ""
 
         nameStrs.append(nameStr)
         nameLens.append(nameLen)
@@ -122,6 +144,35 @@ def _compile_data(items, term):
 
     return (nameStrs, nameLens, details)
 
+def format_dtype(dtype):
+    """
+    Returns a short description of a NumPy dtype.
+    Compound types are summarised by their number of fields.
+    """
+
+    if dtype is None:
+        return str(dtype)
+    if dtype.names:
+        text = "compound, {} fields".format(len(dtype.names))
+    else:
+        text = str(dtype.base)
+    if dtype.shape:
+        text += " {"+", ".join(str(x) for x in dtype.shape)+"}"
+    return text
+
+def format_name(name, item, term):
+    """Returns name of item with colour codes and length w/o them."""
+
+    if item.kind == item.Kind.dataset:
+        return _format_dataset_name(name, term)
+    if item.kind == item.Kind.group:
+        return _format_group_name(name, term)
+    if item.kind == item.Kind.softLink:
+        return _format_softlink_name(name, term, item.dangling)
+    if item.kind == item.Kind.externalLink:
+        return _format_externallink_name(name, term, item.dangling)
+    return (name, len(name))
+
 def _format_dataset_name(name, term):
     """Returns name with colour codes and length w/o them for datasets."""
     return (name, len(name))
@@ -0,0 +1,91 @@
+"""
+Module for peek command.
+"""
+
+from posixpath import normpath
+
+import numpy as np
+
+from . import command
+
+from h5sh.asciiplot import format_number, histogram, summary
+from h5sh.h5data import sample_selections
+from h5sh.util import abspath, format_bytes, split_path
+
+class peek(command.Command):
+    """Command to quickly look at a sample of a dataset."""
+
+    def __init__(self):
+        super(peek, self).__init__()
+
+        self._parser = command.Command.Parser(prog="peek",
+                                              description="Show approximate statistics and a\
+                                              histogram of a numeric dataset based on a sample of\
+                                              its chunks. The amount of data read is bounded,\
+                                              so this is fast regardless of the size of the dataset.")
+        self._parser.add_argument("item",
+                                  help="Dataset to look at.")
+        self._parser.add_argument("-b", "--budget", type=float, default=16,
+                                  help="Maximum amount of data to read in MiB (default: 16).")
+        self._parser.add_argument("-r", "--random", action="store_true",
+                                  help="Sample random chunks instead of evenly strided ones.")
+        self._parser.add_argument("--seed", type=int,
+                                  help="Seed for random sampling.")
+        self._parser.add_argument("--bins", type=int, default=10,
+                                  help="Number of bins of the histogram (default: 10).")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the peek command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        path = abspath(wd, [e for e in split_path(normpath(pa.item)) if e])
+        dset = h5mngr.get_dataset(path)
+        if dset is None:
+            term.print("h5sh: peek: {}: No such dataset".format(pa.item))
+            return
+        if dset.shape is None or dset.dtype.kind not in "biuf":
+            term.print("h5sh: peek: {}: Not a numeric dataset".format(pa.item))
+            return
+
+        term.print("/{}  {{{}}} {}".format("/".join(path), ", ".join(str(x) for x in dset.shape),
+                                           dset.dtype))
+
+        selections, total = sample_selections(dset, int(pa.budget*1024**2),
+                                              pa.random, pa.seed)
+        if dset.shape == ():
+            values = np.asarray(dset[()])
+        else:
+            values = np.concatenate([h5mngr.read_selection(path, slices).reshape(-1)
+                                     for slices in selections] or [np.empty(0, dset.dtype)])
+            unit = "chunks" if dset.chunks else "blocks"
+            if len(selections) == total:
+                term.print("read all {} {} ({})".format(total, unit, format_bytes(values.nbytes)))
+            else:
+                term.print("sampled {} of {} {} ({:.2g}%, {}), values are approximate".format(
+                    len(selections), total, unit, 100*values.size/dset.size,
+                    format_bytes(values.nbytes)))
+
+        stats = summary(values)
+        for key in ("nan", "inf"):
+            if stats[key]:
+                term.print(term.coloured("{} of {} values are {}".format(
+                    stats[key], stats["count"], "NaN" if key == "nan" else "infinite"),
+                                         term.Colour.yellow))
+        if stats["min"] is None:
+            term.print("no finite values")
+            return
+        term.print("min {}  max {}  mean {}  std {}".format(
+            *(format_number(stats[key]) for key in ("min", "max", "mean", "std"))))
+
+        if values.dtype.kind == "f":
+            values = values[np.isfinite(values)]
+        elif values.dtype.kind == "b":
+            values = values.astype(np.uint8)
+        counts, edges = np.histogram(values, bins=max(pa.bins, 1)
+                                     if stats["max"] > stats["min"] else 1,
+                                     range=(stats["min"], stats["max"]))
+        for line in histogram(counts, edges, term.get_width()):
+            term.print(line)
@@ -0,0 +1,88 @@
+"""
+Module for plot command.
+"""
+
+from posixpath import normpath
+
+import numpy as np
+
+from . import command
+
+from h5sh.asciiplot import envelope as render_envelope, format_number, sparkline
+from h5sh.h5data import envelope
+from h5sh.util import abspath, parse_selection, split_path, split_selection
+
+class plot(command.Command):
+    """Command to plot a one dimensional dataset."""
+
+    def __init__(self):
+        super(plot, self).__init__()
+
+        self._parser = command.Command.Parser(prog="plot",
+                                              description="Plot a one dimensional numeric\
+                                              dataset or selection. Each column shows the range\
+                                              between minimum and maximum of the elements it\
+                                              covers, so spikes are never lost. The dataset is\
+                                              read block by block.")
+        self._parser.add_argument("item",
+                                  help="Dataset, optionally with a selection like 'data[:, 5]'.")
+        self._parser.add_argument("-H", "--height", type=int, default=12,
+                                  help="Number of lines of the plot (default: 12).")
+        self._parser.add_argument("-s", "--sparkline", action="store_true",
+                                  help="Draw a single line of the maxima instead.")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the plot command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        spath, sselection = split_selection(pa.item)
+        dset = h5mngr.get_dataset(abspath(wd, [e for e in split_path(normpath(spath)) if e]))
+        if dset is None:
+            term.print("h5sh: plot: {}: No such dataset".format(spath))
+            return
+        if dset.shape is None or dset.dtype.kind not in "biuf":
+            term.print("h5sh: plot: {}: Not a numeric dataset".format(spath))
+            return
+        try:
+            slices, dropped = parse_selection(sselection, dset.shape)
+        except ValueError as e:
+            term.print("h5sh: plot: {}: {}".format(pa.item, e))
+            return
+        if dropped.count(False) != 1:
+            term.print("h5sh: plot: {}: Need a one dimensional selection, e.g. 'data[:, 0]'"
+                       .format(pa.item))
+            return
+
+        axis = dropped.index(False)
+        indices = range(slices[axis].start, slices[axis].stop, slices[axis].step)
+        if len(indices) == 0:
+            term.print("h5sh: plot: {}: Selection is empty".format(pa.item))
+            return
+
+        # leave room for labels of the y-axis
+        width = term.get_width()-12
+        _, mins, maxs = envelope(dset, slices, max(width, 1), h5mngr.check_cancelled)
+        finite = np.isfinite(mins) & np.isfinite(maxs)
+        if not finite.any():
+            term.print("h5sh: plot: {}: No finite values".format(pa.item))
+            return
+        low, high = mins[finite].min(), maxs[finite].max()
+
+        if pa.sparkline:
+            term.print("{} {} {}".format(format_number(low),
+                                         term.coloured(sparkline(maxs, low, high),
+                                                       term.Colour.cyan),
+                                         format_number(high)))
+            return
+
+        height = max(pa.height, 1)
+        for i, line in enumerate(render_envelope(mins, maxs, low, high, height)):
+            label = format_number(high) if i == 0 else format_number(low) if i == height-1 else ""
+            term.print("{:>10} {}{}".format(label, "┤" if label else "│",
+                                             term.coloured(line, term.Colour.cyan)))
+        first, last = str(indices[0]), str(indices[-1])
+        term.print(" "*11+"└"+"─"*len(mins))
+        term.print(" "*12+first+" "*max(len(mins)-len(first)-len(last), 1)+last)
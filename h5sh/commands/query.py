@@ -0,0 +1,76 @@
+"""
+Module for query command.
+"""
+
+import sqlite3
+
+from . import command
+
+from h5sh.digests import file_identity
+from h5sh.metaindex import MetadataIndex
+
+class query(command.Command):
+    """Command to search the index of the file with SQL."""
+
+    def __init__(self, indexFile):
+        """
+        :param indexFile: Name of the database the index is stored in.
+        """
+
+        super(query, self).__init__()
+
+        self._parser = command.Command.Parser(prog="query",
+                                              description="Run an SQL statement against the\
+                                              index built by 'index'. The statement can use the\
+                                              views items(path, parent, name, kind, shape, ndim,\
+                                              size, dtype, itemsize, nbytes, target, dangling)\
+                                              and attributes(path, name, value, dtype, shape)\
+                                              of the current file. Example: query \"SELECT path,\
+                                              nbytes FROM items WHERE dtype='float64' AND path\
+                                              LIKE '/calib/%' ORDER BY nbytes DESC\"")
+        self._parser.add_argument("sql", nargs="+",
+                                  help="SQL statement, arguments are joined by spaces.")
+
+        self._indexFile = indexFile
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the query command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        fname = h5mngr.get_file_name()
+        store = MetadataIndex(self._indexFile)
+        try:
+            state = store.state(fname)
+            if state is None:
+                term.print("h5sh: query: File is not indexed, run 'index' first")
+                return
+            if state[0] != file_identity(fname):
+                term.print(term.coloured("index is out of date, run 'index' to update it",
+                                         term.Colour.yellow))
+
+            try:
+                columns, cursor = store.query(fname, " ".join(pa.sql))
+                rows = []
+                for row in cursor:
+                    if len(rows) % 1000 == 0:
+                        h5mngr.check_cancelled()
+                    rows.append(["NULL" if value is None else str(value) for value in row])
+            except sqlite3.Error as e:
+                term.print("h5sh: query: {}".format(e))
+                return
+        finally:
+            store.close()
+
+        if not columns:
+            return
+        widths = [max(len(row[i]) for row in rows+[columns]) for i in range(len(columns))]
+        term.print(term.coloured("  ".join("{:<{}}".format(column, width)
+                                           for column, width in zip(columns, widths)).rstrip(),
+                                 term.Colour.iblack))
+        for row in rows:
+            term.print("  ".join("{:<{}}".format(value, width)
+                                 for value, width in zip(row, widths)).rstrip())
+        term.print("({} rows)".format(len(rows)))
@@ -0,0 +1,54 @@
+"""
+Module for run_profiled command.
+"""
+
+import argparse
+import cProfile
+import io
+import pstats
+
+from . import command
+
+class run_profiled(command.Command):
+    """Command to run another command under the Python profiler."""
+
+    def __init__(self, execute):
+        super(run_profiled, self).__init__()
+
+        self._parser = command.Command.Parser(prog="profile",
+                                              description="Run a command under cProfile and show the most expensive functions.")
+        self._parser.add_argument("-n", type=int, default=20,
+                                  help="Number of entries to show (20 by default).")
+        self._parser.add_argument("-s", "--sort", default="cumulative",
+                                  help="Key to sort entries by, see pstats.Stats.sort_stats\
+                                  ('cumulative' by default).")
+        self._parser.add_argument("cmd", nargs=argparse.REMAINDER,
+                                  help="Command to run.")
+
+        self._execute = execute
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the run_profiled command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        if not pa.cmd:
+            term.print("h5sh: profile: no command given")
+            return
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            self._execute(pa.cmd, h5mngr, term)
+        finally:
+            profiler.disable()
+
+        stream = io.StringIO()
+        try:
+            pstats.Stats(profiler, stream=stream).sort_stats(pa.sort).print_stats(pa.n)
+        except KeyError:
+            term.print("h5sh: profile: unknown sort key '{}'".format(pa.sort))
+            return
+        term.print(stream.getvalue().strip("\n"))
@@ -0,0 +1,60 @@
+"""
+Module for run_timed command.
+"""
+
+import argparse
+import os
+import time
+
+from . import command
+
+class run_timed(command.Command):
+    """Command to measure the time it takes to run another command."""
+
+    def __init__(self, execute):
+        super(run_timed, self).__init__()
+
+        self._parser = command.Command.Parser(prog="time",
+                                              description="Run a command and report the time it took.\
+                                              Also shows which counters of the file manager changed.")
+        self._parser.add_argument("cmd", nargs=argparse.REMAINDER,
+                                  help="Command to run.")
+
+        self._execute = execute
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the run_timed command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        if not pa.cmd:
+            term.print("h5sh: time: no command given")
+            return
+
+        statsBefore = h5mngr.get_stats()
+        timesBefore = os.times()
+        start = time.perf_counter()
+
+        self._execute(pa.cmd, h5mngr, term)
+
+        real = time.perf_counter()-start
+        timesAfter = os.times()
+        statsAfter = h5mngr.get_stats()
+
+        term.print("")
+        term.print("real  {}".format(_format_duration(real)))
+        term.print("user  {}".format(_format_duration(timesAfter.user-timesBefore.user)))
+        term.print("sys   {}".format(_format_duration(timesAfter.system-timesBefore.system)))
+
+        # only show counters that were touched by the command
+        for key in statsAfter:
+            delta = statsAfter[key]-statsBefore.get(key, 0)
+            if delta:
+                term.print("{:>16s}  {:+d}".format(key, delta))
+
+
+def _format_duration(secs):
+    """Format a duration in seconds like the time command of bash."""
+    return "{:d}m{:.3f}s".format(int(secs//60), secs%60)
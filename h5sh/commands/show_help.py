@@ -36,8 +36,7 @@ Aliases:
 
 Use option --help on a command to see a description.
 """.format(version=self._version, fname=h5mngr.get_file_name(),
-           commands="\n   ".join("{:>10s}  =  {}".format(cmd, self._cmds[cmd]\
-                                                         .get_description().split(".")[0])
+           commands="\n   ".join("{:>10s}  =  {}".format(cmd, _summary(self._cmds[cmd]))
                                  for cmd in self._cmds),
            aliases="\n   ".join("{:>10s}  =  '{}'".format(ali, val)
                                 for ali, val in self._aliases.items()))
@@ -59,3 +58,7 @@ For more information visit https://github.com/jl-wynen/h5shell\
 """
 
         term.print(helpStr)
+
+def _summary(cmd):
+    """Return the first sentence of the description of cmd on a single line."""
+    return " ".join(cmd.get_description().split()).split(".")[0]
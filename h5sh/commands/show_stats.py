@@ -0,0 +1,31 @@
+"""
+Module for show_stats command.
+"""
+
+from . import command
+
+class show_stats(command.Command):
+    """Command to show instrumentation counters of the file manager."""
+
+    def __init__(self):
+        super(show_stats, self).__init__()
+
+        self._parser = command.Command.Parser(prog="stats",
+                                              description="Show counters of operations performed on the file.")
+        self._parser.add_argument("-r", "--reset", action="store_true",
+                                  help="Set all counters to zero after showing them.")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the show_stats command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        stats = h5mngr.get_stats()
+        width = max(len(key) for key in stats)
+        for key, val in stats.items():
+            term.print("{key:>{width}s}  {val:d}".format(key=key, width=width, val=val))
+
+        if pa.reset:
+            h5mngr.reset_stats()
@@ -0,0 +1,79 @@
+"""
+Module for tail command.
+"""
+
+from posixpath import normpath
+
+from . import command
+from .head import print_data
+
+from h5sh.util import abspath, split_path
+
+class tail(command.Command):
+    """Command to print the last elements of a dataset and follow it as it grows."""
+
+    def __init__(self):
+        super(tail, self).__init__()
+
+        self._parser = command.Command.Parser(prog="tail",
+                                              description="Print the last elements of a\
+                                              dataset along its first axis. With -f, keep\
+                                              printing elements as they are appended until\
+                                              interrupted with ctrl+c. Only new elements are\
+                                              read. Start h5sh with --swmr to follow files\
+                                              that are written in SWMR mode.")
+        self._parser.add_argument("item",
+                                  help="Dataset to print.")
+        self._parser.add_argument("-n", "--lines", type=int, default=10,
+                                  help="Number of elements to print (default: 10).")
+        self._parser.add_argument("-f", "--follow", action="store_true",
+                                  help="Print new elements as the dataset grows.")
+        self._parser.add_argument("-s", "--sleep-interval", type=float, default=1.0,
+                                  help="Seconds to wait between checks for new elements\
+                                  with -f (default: 1).")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the tail command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        path = abspath(wd, [e for e in split_path(normpath(pa.item)) if e])
+        dset = h5mngr.get_dataset(path)
+        if dset is None:
+            term.print("h5sh: tail: {}: No such dataset".format(pa.item))
+            return
+        if not dset.shape:
+            term.print("h5sh: tail: {}: Dataset has no axes".format(pa.item))
+            return
+
+        length = dset.shape[0]
+        _print_rows(h5mngr, path, dset, max(length-max(pa.lines, 0), 0), length, term)
+        if not pa.follow:
+            return
+
+        while True:
+            h5mngr.wait(pa.sleep_interval)
+            # refreshes only this dataset in SWMR mode, otherwise re-reads the file if it changed
+            h5mngr.start_command()
+            h5mngr.refresh(path)
+            dset = h5mngr.get_dataset(path)
+            if dset is None or not dset.shape:
+                term.print("h5sh: tail: {}: Dataset was removed".format(pa.item))
+                return
+
+            if dset.shape[0] < length:
+                term.print("h5sh: tail: {}: Dataset was truncated".format(pa.item))
+            else:
+                _print_rows(h5mngr, path, dset, length, dset.shape[0], term)
+            length = dset.shape[0]
+
+
+def _print_rows(h5mngr, path, dset, start, stop, term):
+    """Read and print elements [start, stop) along the first axis of a dataset."""
+
+    if start >= stop:
+        return
+    slices = [slice(start, stop, 1)]+[slice(0, n, 1) for n in dset.shape[1:]]
+    print_data(h5mngr.read_selection(path, slices), slices[0], term)
@@ -0,0 +1,181 @@
+"""
+Module for tree command.
+"""
+
+from posixpath import normpath
+import re
+
+from . import command
+from .ls import format_name
+
+from h5sh.util import split_path, abspath
+
+class tree(command.Command):
+    """Command to show the structure of a group as a tree."""
+
+    def __init__(self):
+        super(tree, self).__init__()
+
+        self._parser = command.Command.Parser(prog="tree",
+                                              description="List contents of groups in a tree-like format.")
+        self._parser.add_argument("group", nargs="?", default=".",
+                                  help="Group to show (the current group by default).")
+        self._parser.add_argument("-L", type=int, default=None, metavar="level",
+                                  help="Descend only level groups deep.")
+        self._parser.add_argument("-d", action="store_true",
+                                  help="List groups only.")
+        self._parser.add_argument("--summary", action="store_true",
+                                  help="Collapse siblings with numbered names and equal kind,\
+                                  shape and dtype into a single line.")
+        self._parser.add_argument("--min-run", type=int, default=4, metavar="N",
+                                  help="Minimum number of siblings to collapse\
+                                  with --summary (4 by default).")
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the tree command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        path = abspath(wd, [e for e in split_path(normpath(pa.group)) if e])
+        h5mngr.refresh()
+        if h5mngr.get_children(path) is None:
+            term.print("h5sh: tree: {}: No such group".format("/"+"/".join(path)))
+            return
+
+        term.print(term.coloured("/"+"/".join(path), term.Colour.iblue))
+
+        # print lines as they come to show something quickly for huge files
+        ngroups, ndsets = 0, 0
+        for line, nkids in _tree_lines(h5mngr, path, "", 1, pa, term):
+            term.print(line)
+            ngroups += nkids[0]
+            ndsets += nkids[1]
+
+        term.print("")
+        if pa.d:
+            term.print("{} groups".format(ngroups))
+        else:
+            term.print("{} groups, {} datasets".format(ngroups, ndsets))
+
+
+def _tree_lines(h5mngr, path, prefix, depth, pa, term):
+    """
+    Generate the lines of the tree below group at path.
+
+    :param prefix: String to put in front of all lines for this group.
+    :param depth: Depth of the children of the group.
+    :param pa: Parsed arguments of tree command.
+
+    :returns:
+        Generator of tuples of a line and a tuple of numbers of groups and datasets
+        represented by that line.
+    """
+
+    h5mngr.check_cancelled()
+
+    children = h5mngr.get_children(path)
+    entries = sorted(children.items())
+    if pa.d:
+        entries = [(name, item) for name, item in entries if item.kind == item.Kind.group]
+    if pa.summary:
+        entries = _collapse(entries, pa.min_run)
+
+    for i, (name, item) in enumerate(entries):
+        last = i == len(entries)-1
+        branch = prefix+("└── " if last else "├── ")
+
+        if isinstance(item, _Run):
+            yield branch+item.format(term), item.count()
+            continue
+
+        nameStr, _ = format_name(name, item, term)
+        if item.kind == item.Kind.group and item.target is not None:
+            # not entered to avoid cycles and counting groups twice
+            yield branch+nameStr+" -> "+_format_target(item.target), (0, 0)
+        elif item.kind == item.Kind.group:
+            yield branch+nameStr, (1, 0)
+            if pa.L is None or depth < pa.L:
+                yield from _tree_lines(h5mngr, path+[name],
+                                       prefix+("    " if last else "│   "),
+                                       depth+1, pa, term)
+        elif item.kind == item.Kind.dataset:
+            yield branch+nameStr, (0, 1)
+        elif item.kind == item.Kind.datatype:
+            yield branch+nameStr+" (named datatype)", (0, 0)
+        else:
+            yield branch+nameStr+" -> "+_format_target(item.target), (0, 0)
+
+def _format_target(target):
+    """Format the target of a soft (string) or external (tuple) link."""
+
+    if isinstance(target, str):
+        return target
+    return target[0]+"//"+target[1]
+
+
+class _Run:
+    """Siblings with numbered names and equal properties, shown as one entry."""
+
+    def __init__(self, item):
+        self.items = [item]  # list of tuples (number, name, item)
+
+    def count(self):
+        """Return numbers of groups and datasets in the run."""
+        kind = self.items[0][2].kind
+        return (len(self.items) if kind == kind.group else 0,
+                len(self.items) if kind == kind.dataset else 0)
+
+    def format(self, term):
+        """Format the run for output."""
+
+        self.items.sort(key=lambda x: x[0])
+        first, last = self.items[0], self.items[-1]
+        item = first[2]
+        nameStr = term.coloured(first[1], term.Colour.iblue) if item.kind == item.Kind.group \
+                  else first[1]
+        nameStr += ".."
+        nameStr += term.coloured(last[1], term.Colour.iblue)+"/" \
+                   if item.kind == item.Kind.group else last[1]
+
+        if item.kind == item.Kind.group:
+            return nameStr+" ({} groups)".format(len(self.items))
+        return nameStr+" ({} datasets, {} {{{}}})".format(len(self.items), item.dtype,
+                                                          ", ".join(str(x) for x in item.shape or ()))
+
+
+_NUMBERED = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+def _collapse(entries, minRun):
+    """
+    Replace runs of at least minRun groups or datasets which differ only by a number
+    in their names and have the same shape and dtype by a _Run.
+    The run takes the place of its first member.
+    """
+
+    runs = {}
+    keys = []
+    for name, item in entries:
+        match = _NUMBERED.match(name)
+        if match and item.kind in (item.Kind.group, item.Kind.dataset) and item.target is None:
+            key = (match.group(1), match.group(3), item.kind,
+                   item.shape, str(item.dtype) if item.dtype is not None else None)
+            if key in runs:
+                runs[key].items.append((int(match.group(2)), name, item))
+            else:
+                runs[key] = _Run((int(match.group(2)), name, item))
+            keys.append(key)
+        else:
+            keys.append(None)
+
+    result = []
+    emitted = set()
+    for (name, item), key in zip(entries, keys):
+        if key is None or len(runs[key].items) < minRun:
+            result.append((name, item))
+        elif key not in emitted:
+            # first member of the run
+            emitted.add(key)
+            result.append((name, runs[key]))
+    return result
@@ -0,0 +1,78 @@
+"""
+Module for watch command.
+"""
+
+import argparse
+import re
+import time
+
+from . import command
+
+from h5sh.batch import CaptureTerminal
+
+class watch(command.Command):
+    """Command to run another command repeatedly and show its output."""
+
+    def __init__(self, execute):
+        super(watch, self).__init__()
+
+        self._parser = command.Command.Parser(prog="watch",
+                                              description="Run a command repeatedly and show\
+                                              its output, redrawing only lines that changed.\
+                                              The command is only run again when the file has\
+                                              changed, otherwise no HDF5 work is done at all.\
+                                              Stop with ctrl+c.")
+        self._parser.add_argument("-n", "--interval", type=float, default=2.0,
+                                  help="Seconds between checks for changes (default: 2).")
+        self._parser.add_argument("cmd", nargs=argparse.REMAINDER,
+                                  help="Command to run.")
+
+        self._execute = execute
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the watch command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        if not pa.cmd:
+            term.print("h5sh: watch: no command given")
+            return
+
+        shown = []
+        output = []
+        generation = None
+        while True:
+            # every check counts as a new command for refreshing datasets in SWMR mode
+            h5mngr.start_command()
+            h5mngr.refresh()
+            if h5mngr.get_generation() != generation:
+                generation = h5mngr.get_generation()
+                capture = CaptureTerminal(term.get_width(), term)
+                self._execute(pa.cmd, h5mngr, capture)
+                output = capture.get_output()
+
+            lines = ["Every {:g}s: {}  {}".format(pa.interval, " ".join(pa.cmd),
+                                                 time.strftime("%H:%M:%S")), ""]+output
+            # lines must fit on the screen to be redrawn in place
+            lines = [_truncate(line, term.get_width())
+                     for line in lines[:max(term.get_height()-1, 1)]]
+            term.replace_lines(shown, lines)
+            shown = lines
+
+            h5mngr.wait(pa.interval)
+
+
+def _truncate(line, width):
+    """Cut line to width visible characters, keeping all colour codes."""
+
+    result = []
+    for i, part in enumerate(re.split("(\x1b\\[[0-9;]*m)", line)):
+        if i % 2 == 1:
+            # colour code
+            result.append(part)
+        else:
+            result.append(part[:width])
+            width -= len(result[-1])
+    return "".join(result)
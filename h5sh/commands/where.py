@@ -0,0 +1,104 @@
+"""
+Module for where command.
+"""
+
+from posixpath import normpath
+
+from . import command
+
+from h5sh.digests import file_identity
+from h5sh.h5data import object_address
+from h5sh.util import abspath, parse_predicate, split_path
+from h5sh.zonemaps import ZoneMapStore, scan, search, zone_length
+
+class where(command.Command):
+    """Command to find elements of a dataset that satisfy a comparison."""
+
+    def __init__(self, zoneMapFile):
+        """
+        :param zoneMapFile: Name of the database to store zone maps in.
+        """
+
+        super(where, self).__init__()
+
+        self._parser = command.Command.Parser(prog="where",
+                                              description="Print indices and values of all\
+                                              elements of a numeric dataset that satisfy a\
+                                              comparison. For example, where /adc/ch3 '> 4000'\
+                                              prints all elements greater than 4000.\
+                                              The first search reads the whole dataset and\
+                                              stores the minimum and maximum of every zone of\
+                                              about 1 MiB. Later searches only read zones\
+                                              that can contain matches, as long as the file\
+                                              does not change.")
+        self._parser.add_argument("item",
+                                  help="Dataset to search.")
+        self._parser.add_argument("predicate", nargs="+",
+                                  help="Comparison with a number using one of\
+                                  <, <=, >, >=, ==, !=.")
+        self._parser.add_argument("-n", "--max-results", type=int, default=20,
+                                  help="Maximum number of matches to print, all matches\
+                                  are counted (default: 20).")
+        self._parser.add_argument("--no-cache", action="store_true",
+                                  help="Read the whole dataset even if a zone map is stored.")
+
+        self._zoneMapFile = zoneMapFile
+
+    def __call__(self, args, wd, h5mngr, term):
+        """Execute the where command."""
+
+        pa = self._parse_args(args, term)
+        if not pa:
+            return
+
+        path = abspath(wd, [e for e in split_path(normpath(pa.item)) if e])
+        dset = h5mngr.get_dataset(path)
+        if dset is None:
+            term.print("h5sh: where: {}: No such dataset".format(pa.item))
+            return
+        if dset.shape is None or dset.dtype.kind not in "biuf":
+            term.print("h5sh: where: {}: Not a numeric dataset".format(pa.item))
+            return
+        if not dset.shape or dset.size == 0:
+            term.print("h5sh: where: {}: Dataset has no elements to search".format(pa.item))
+            return
+        try:
+            op, value = parse_predicate(" ".join(pa.predicate))
+        except ValueError as e:
+            term.print("h5sh: where: {}".format(e))
+            return
+
+        fname = h5mngr.get_file_name()
+        identity = file_identity(fname)
+        addr = object_address(dset)
+        length = zone_length(dset)
+        nzones = -(-dset.shape[0]//length)
+
+        store = ZoneMapStore(self._zoneMapFile)
+        try:
+            zoneMap = None if pa.no_cache else store.lookup(identity, addr)
+            if zoneMap is None or zoneMap.length != length or len(zoneMap.mins) != nzones:
+                zoneMap, results = scan(dset, op, value, h5mngr.check_cancelled)
+                nread = None
+            else:
+                nread, results = search(dset, zoneMap, op, value, h5mngr.check_cancelled)
+
+            nmatches = 0
+            for indices, values in results:
+                for i in range(min(len(values), max(pa.max_results-nmatches, 0))):
+                    index = indices[0][i] if len(indices) == 1 \
+                        else "("+", ".join(str(idx[i]) for idx in indices)+")"
+                    term.print("{}  {}".format(index, values[i]))
+                nmatches += len(values)
+
+            if nread is None:
+                # only store complete zone maps
+                store.store(identity, fname, addr, "/"+"/".join(path), zoneMap)
+                nread = nzones
+        finally:
+            store.close()
+
+        if nmatches > pa.max_results:
+            term.print("...")
+        term.print(term.coloured("{} matches, read {} of {} zones".format(nmatches, nread, nzones),
+                                 term.Colour.iblack))
@@ -0,0 +1,78 @@
+"""
+Persistent store of dataset digests.
+"""
+
+import os
+import sqlite3
+import time
+
+def file_identity(fname):
+    """
+    Return a string identifying the current state of a file.
+    Changes whenever the file is modified or replaced.
+    """
+
+    st = os.stat(fname)
+    return "{}:{}:{}:{}".format(st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+class DigestStore:
+    """
+    Stores digests of datasets in an SQLite database.
+
+    Digests are keyed by the identity of the file (see file_identity())
+    and the address of the dataset in the file. As long as a file does not
+    change, its digests can thus be looked up instead of being recomputed.
+    In addition, the most recent digest of every dataset is available by the
+    name of the file and the path of the dataset to verify new versions of a file.
+    """
+
+    def __init__(self, fname):
+        """
+        :param fname: Name of the database file. Created if it does not exist.
+        """
+
+        self._db = sqlite3.connect(fname)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS digests (
+                              file TEXT, addr INTEGER, fname TEXT, path TEXT,
+                              digest TEXT, time REAL,
+                              PRIMARY KEY (file, addr))""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS digests_path ON digests (fname, path)")
+        self._db.commit()
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def lookup(self, identity, addr):
+        """Return the digest of the dataset at addr in given file or None if unknown."""
+
+        row = self._db.execute("SELECT digest FROM digests WHERE file=? AND addr=?",
+                               (identity, addr)).fetchone()
+        return row[0] if row else None
+
+    def reference(self, fname, path):
+        """
+        Return the most recently stored digest of a dataset identified by file name
+        and path, regardless of the state of the file. None if there is none.
+        """
+
+        row = self._db.execute("""SELECT digest FROM digests WHERE fname=? AND path=?
+                                  ORDER BY time DESC LIMIT 1""",
+                               (os.path.realpath(fname), path)).fetchone()
+        return row[0] if row else None
+
+    def store(self, identity, fname, entries):
+        """
+        Store digests.
+
+        :param identity: Identity of the file.
+        :param fname: Name of the file.
+        :param entries: Iterable of tuples (addr, path, digest).
+        """
+
+        now = time.time()
+        fname = os.path.realpath(fname)
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                                 ((identity, addr, fname, path, digest, now)
+                                  for addr, path, digest in entries))
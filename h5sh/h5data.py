@@ -0,0 +1,734 @@
+"""
+Access to the contents of datasets.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import collections
+import hashlib
+import itertools
+import os
+import threading
+import zlib
+
+import numpy as np
+import h5py as h5
+
+# default maximum number of bytes to read at once
+BLOCK_BYTES = 16*1024*1024
+# size of blocks in sample_selections() for datasets that are not chunked
+SAMPLE_BLOCK_BYTES = 256*1024
+
+def block_length(dset, maxBytes=BLOCK_BYTES):
+    """
+    Return the number of elements along the first axis to read at once.
+    The result is a multiple of the chunk size along that axis if the dataset is chunked.
+    """
+
+    rowBytes = dset.dtype.itemsize*int(np.prod(dset.shape[1:], dtype=np.int64))
+    length = max(maxBytes//max(rowBytes, 1), 1)
+    if dset.chunks:
+        length = max(length//dset.chunks[0], 1)*dset.chunks[0]
+    return min(length, dset.shape[0])
+
+def iter_blocks(dset, maxBytes=BLOCK_BYTES):
+    """
+    Generate selections covering the whole dataset in blocks along the first axis.
+    Blocks are aligned with chunks and hold at most about maxBytes.
+    Yields nothing for datasets without a dataspace.
+    """
+
+    if dset.shape is None:
+        return
+    if dset.shape == ():
+        yield ()
+        return
+
+    length = block_length(dset, maxBytes)
+    for start in range(0, dset.shape[0], length):
+        yield np.s_[start:min(start+length, dset.shape[0])]
+
+def memmap_dataset(dset):
+    """
+    Map the data of a dataset into memory if it is stored contiguously and unfiltered
+    in the file itself. Reading from the map bypasses HDF5 and does not copy data.
+
+    :returns:
+        Read-only numpy.memmap with the shape and dtype of the dataset or None
+        if the dataset cannot be mapped.
+    """
+
+    if dset.shape is None or dset.chunks or dset.dtype.hasobject:
+        return None
+    if dset.file.driver not in ("sec2", "stdio"):
+        # data is not simply stored in one file
+        return None
+
+    dcpl = dset.id.get_create_plist()
+    if dcpl.get_layout() != h5.h5d.CONTIGUOUS or dcpl.get_external_count() > 0 \
+       or dset.id.get_type().get_size() != dset.dtype.itemsize:
+        return None
+    offset = dset.id.get_offset()
+    if offset is None:
+        # not allocated yet, e.g. because the dataset is empty
+        return None
+
+    try:
+        return np.memmap(dset.file.filename, mode="r", dtype=dset.dtype,
+                         shape=dset.shape, offset=offset)
+    except (OSError, ValueError):
+        return None
+
+def array_view(dset):
+    """
+    Return an object to read data from a dataset with NumPy style indexing.
+    This is a memory map as returned by memmap_dataset() if possible
+    and the dataset itself otherwise.
+    """
+
+    mapped = memmap_dataset(dset)
+    return dset if mapped is None else mapped
+
+def read_into(data, dest, source, destSelection):
+    """
+    Read data[source] into dest[destSelection].
+
+    :param data: Dataset or memory map as returned by array_view().
+    :param dest: Contiguous NumPy array to read into.
+    """
+
+    if isinstance(data, np.ndarray):
+        dest[destSelection] = data[source]
+    else:
+        data.read_direct(dest, source, destSelection)
+
+def sample_selections(dset, maxBytes, randomly=False, seed=None):
+    """
+    Choose blocks of a dataset that are spread over the whole dataset
+    to read a sample of at most about maxBytes.
+    Blocks are the chunks of chunked datasets and groups of whole rows otherwise.
+    Blocks are evenly strided unless randomly is True.
+
+    :returns:
+        Tuple of a list of selected blocks as lists of normalised slices and the
+        total number of blocks in the dataset.
+    """
+
+    if not dset.shape or 0 in dset.shape:
+        return [], 0
+
+    if dset.chunks:
+        block = dset.chunks
+    else:
+        block = (block_length(dset, SAMPLE_BLOCK_BYTES),)+dset.shape[1:]
+    grid = [-(-n//b) for n, b in zip(dset.shape, block)]
+    total = int(np.prod(grid, dtype=np.int64))
+    blockBytes = int(np.prod(block, dtype=np.int64))*dset.dtype.itemsize
+
+    nsample = min(total, max(maxBytes//max(blockBytes, 1), 1))
+    if nsample == total:
+        indices = range(total)
+    elif randomly:
+        indices = np.sort(np.random.default_rng(seed).choice(total, nsample, replace=False))
+    else:
+        indices = np.unique(np.linspace(0, total-1, nsample).round().astype(np.int64))
+
+    selections = [[slice(int(i)*b, min((int(i)+1)*b, n), 1)
+                   for i, b, n in zip(np.unravel_index(index, grid), block, dset.shape)]
+                  for index in indices]
+    return selections, total
+
+def selection_shape(slices):
+    """Return the shape of the result of selecting given normalised slices."""
+    return tuple(len(range(s.start, s.stop, s.step)) for s in slices)
+
+def iter_selection_blocks(dset, slices, maxBytes=BLOCK_BYTES):
+    """
+    Split a selection into blocks along its first dimension.
+    Blocks are aligned with chunks of the dataset if the selection has a step
+    of one in the first dimension. Each block holds at most about maxBytes
+    or one chunk along the first dimension, whichever is larger.
+
+    :param dset: h5py Dataset to select from.
+    :param slices: List of normalised slices as returned by util.parse_selection().
+
+    :returns:
+        Generator of tuples (source, start, stop) where source is a tuple of slices into
+        the dataset and start and stop delimit the block along the first dimension of
+        the selection.
+    """
+
+    shape = selection_shape(slices)
+    if not shape or shape[0] == 0:
+        return
+
+    first = slices[0]
+    rowBytes = dset.dtype.itemsize*int(np.prod(shape[1:], dtype=np.int64))
+    length = max(maxBytes//max(rowBytes, 1), 1)
+
+    if dset.chunks and first.step == 1:
+        # make blocks end at chunk boundaries
+        chunk = dset.chunks[0]
+        length = max(length//chunk, 1)*chunk
+        start = 0
+        while start < shape[0]:
+            dsStart = first.start+start
+            dsStop = min((dsStart//chunk)*chunk+length, first.stop)
+            stop = dsStop-first.start
+            yield (slice(dsStart, dsStop, 1),)+tuple(slices[1:]), start, stop
+            start = stop
+    else:
+        for start in range(0, shape[0], length):
+            stop = min(start+length, shape[0])
+            yield (slice(first.start+start*first.step, first.start+(stop-1)*first.step+1,
+                         first.step),)+tuple(slices[1:]), start, stop
+
+def max_block_length(dset, slices, maxBytes=BLOCK_BYTES):
+    """Return the maximum length of blocks generated by iter_selection_blocks()."""
+    return max((stop-start for _, start, stop in iter_selection_blocks(dset, slices, maxBytes)),
+               default=0)
+
+def read_blocks(dset, slices, check=None):
+    """
+    Read a selection block by block as given by iter_selection_blocks().
+    Blocks are views of a memory map of the dataset if possible. Otherwise,
+    they are read into a buffer that is reused for all blocks, using
+    read_selection() for chunks that can be decompressed in parallel.
+
+    :param dset: h5py Dataset to read from.
+    :param slices: List of normalised slices as returned by util.parse_selection().
+                   Empty for scalar datasets.
+    :param check: Function to call between blocks, e.g. to check for cancellation.
+
+    :returns:
+        Generator of tuples (start, stop, block) where block is a contiguous array
+        holding the selection along the first dimension from start to stop.
+        The block is only valid until the next iteration.
+    """
+
+    data = array_view(dset)
+
+    if not slices:
+        # scalar dataset
+        yield 0, 1, read_selection(dset, slices)
+        return
+
+    if isinstance(data, np.ndarray) or dset.dtype.hasobject:
+        for source, start, stop in iter_selection_blocks(dset, slices):
+            if check:
+                check()
+            yield start, stop, np.ascontiguousarray(data[source])
+        return
+
+    shape = selection_shape(slices)
+    buf = np.empty((max_block_length(dset, slices),)+shape[1:], dtype=dset.dtype)
+    for source, start, stop in iter_selection_blocks(dset, slices):
+        if check:
+            check()
+        yield start, stop, read_selection(dset, list(source), check=check,
+                                          out=buf[:stop-start])
+
+def read_fields(dset, slices, fields, check=None):
+    """
+    Read some fields of a selection of a compound dataset.
+    Only the given fields are transferred by HDF5, block by block, and stored
+    in one compact array per field, so the other fields never take up memory.
+
+    :param dset: h5py Dataset with a compound type to read from.
+    :param slices: List of normalised slices as returned by util.parse_selection().
+                   Empty for scalar datasets.
+    :param fields: List of names of fields of the dataset.
+    :param check: Function to call between blocks, e.g. to check for cancellation.
+
+    :returns:
+        Dict of field name to array with shape selection_shape(slices)
+        followed by the shape of the field, in the order of fields.
+    """
+
+    shape = selection_shape(slices)
+    out = {name: np.empty(shape+dset.dtype[name].shape, dtype=dset.dtype[name].base)
+           for name in fields}
+    blocks = ((source, slice(start, stop)) for source, start, stop
+              in iter_selection_blocks(dset, slices)) if slices else [((), Ellipsis)]
+    for source, dest in blocks:
+        if check:
+            check()
+        # h5py returns a plain array if only one field is selected
+        block = dset[tuple(fields)+tuple(source)]
+        for name in fields:
+            out[name][dest] = block if len(fields) == 1 else block[name]
+    return out
+
+class ChunkCache:
+    """
+    Least recently used cache of decompressed chunks with a limit on its total size.
+    Can be shared between datasets and threads.
+    """
+
+    def __init__(self, maxBytes):
+        """
+        :param maxBytes: Maximum number of bytes of all cached chunks.
+        """
+
+        self._maxBytes = maxBytes
+        self._chunks = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the chunk stored under key or None if it is not cached."""
+
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                self.misses += 1
+                return None
+            self._chunks.move_to_end(key)
+            self.hits += 1
+            return chunk
+
+    def put(self, key, chunk):
+        """Store a chunk, evicting the least recently used ones if necessary."""
+
+        if chunk.nbytes > self._maxBytes:
+            return
+        with self._lock:
+            old = self._chunks.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            while self._chunks and self._nbytes+chunk.nbytes > self._maxBytes:
+                self._nbytes -= self._chunks.popitem(last=False)[1].nbytes
+            self._chunks[key] = chunk
+            self._nbytes += chunk.nbytes
+
+    def discard(self, prefix):
+        """Remove all chunks whose keys start with the tuple prefix."""
+
+        with self._lock:
+            for key in [key for key in self._chunks if key[:len(prefix)] == prefix]:
+                self._nbytes -= self._chunks.pop(key).nbytes
+
+    def clear(self):
+        """Remove all chunks."""
+
+        with self._lock:
+            self._chunks.clear()
+            self._nbytes = 0
+
+    def get_size(self):
+        """Return tuple of number of chunks and bytes in the cache."""
+        return len(self._chunks), self._nbytes
+
+def chunk_cache_parameters(dset, maxBytes):
+    """
+    Choose parameters of the HDF5 chunk cache for a chunked dataset.
+    The cache is made large enough to hold all chunks in a slab of one chunk
+    along the first axis if possible, but at most maxBytes and at least one chunk.
+
+    :returns: Tuple (nslots, nbytes) for h5py.h5p.PropDAID.set_chunk_cache().
+    """
+
+    chunkBytes = int(np.prod(dset.chunks, dtype=np.int64))*dset.dtype.itemsize
+    slabBytes = chunkBytes*int(np.prod([-(-n//c) for n, c in zip(dset.shape[1:], dset.chunks[1:])],
+                                       dtype=np.int64))
+    nbytes = max(min(slabBytes, maxBytes), chunkBytes)
+    # HDF5 recommends 100 times as many slots as chunks fit into the cache, prime
+    return _next_prime(max(100*(nbytes//max(chunkBytes, 1)), 521)), nbytes
+
+def _next_prime(n):
+    """Return the smallest prime number >= n."""
+
+    while any(n % d == 0 for d in range(2, int(n**0.5)+1)):
+        n += 1
+    return n
+
+def read_selection(dset, slices, cache=None, check=None, out=None):
+    """
+    Read a selection of a dataset.
+
+    Chunked datasets whose filters are supported by decode_chunk() are assembled
+    from raw chunks that are decompressed in a pool of threads. If a cache is given,
+    chunks are looked up in and added to it so repeated reads do not need to
+    decompress them again; this is also done for datasets with other filters.
+    All other datasets are read directly through array_view().
+
+    :param dset: h5py Dataset to read from.
+    :param slices: List of normalised slices as returned by util.parse_selection().
+                   Empty for scalar datasets.
+    :param cache: ChunkCache to use or None.
+    :param check: Function to call between chunks, e.g. to check for cancellation.
+    :param out: Contiguous array with shape selection_shape(slices) to read into.
+                A new array is allocated if None. Ignored for variable length data.
+
+    :returns: Array with shape selection_shape(slices), out if given.
+    """
+
+    shape = selection_shape(slices)
+    if dset.dtype.hasobject:
+        return np.array(dset[tuple(slices)] if slices else dset[()])
+
+    if out is None:
+        out = np.empty(shape, dtype=dset.dtype)
+    if 0 in shape:
+        return out
+    decode = can_decode(dset)
+    if not dset.chunks or (cache is None and not decode):
+        read_into(array_view(dset), out, tuple(slices), Ellipsis)
+        return out
+
+    # indices of chunks that contain selected elements, per dimension
+    ranges = [range(s.start//c, (s.stop-1)//c+1) if s.step <= c
+              else np.unique(np.arange(s.start, s.stop, s.step)//c)
+              for s, c in zip(slices, dset.chunks)]
+    offsets = (tuple(int(i)*c for i, c in zip(index, dset.chunks))
+               for index in itertools.product(*ranges))
+
+    for offset, chunk in _iter_chunks(dset, offsets, cache, decode, check):
+        source, dest = [], []
+        for s, o, n in zip(slices, offset, chunk.shape):
+            # first and end of selected indices inside this chunk
+            first = s.start+max(-(-(o-s.start)//s.step), 0)*s.step
+            end = min(o+n, s.stop)
+            source.append(slice(first-o, end-o, s.step))
+            dest.append(slice((first-s.start)//s.step, (end-s.start-1)//s.step+1))
+        out[tuple(dest)] = chunk[tuple(source)]
+    return out
+
+def _iter_chunks(dset, offsets, cache, decode, check):
+    """
+    Read chunks of a dataset, cropped to the extent of the dataset.
+    Raw chunks are read one after another and decompressed in a pool of threads
+    if decode is True. Otherwise, chunks are read through HDF5.
+
+    :returns: Generator of tuples (offset, chunk) in the order of offsets.
+    """
+
+    key = (dset.file.filename, object_address(dset)) if cache is not None else None
+    if decode:
+        codes = [code for code, _, _ in filters(dset)]
+        pool = _decompression_pool()
+    # bound the number of decompressed chunks waiting to be used
+    limit = 2*DECOMPRESSION_THREADS if decode else 0
+
+    pending = collections.deque()  # tuples of offset and future or chunk
+    try:
+        for offset in offsets:
+            if check:
+                check()
+
+            extent = tuple(slice(0, min(c, n-o)) for o, c, n
+                           in zip(offset, dset.chunks, dset.shape))
+            chunk = cache.get(key+(offset,)) if cache is not None else None
+            if chunk is None and decode:
+                raw = _read_raw_chunk(dset, offset)
+                if raw is None:
+                    chunk = np.full([s.stop for s in extent], dset.fillvalue, dtype=dset.dtype)
+                else:
+                    chunk = pool.submit(_decode_and_crop, raw[1], raw[0], codes, dset.dtype,
+                                        dset.chunks, extent)
+            elif chunk is None:
+                chunk = dset[tuple(slice(o, o+s.stop) for o, s in zip(offset, extent))]
+                if cache is not None:
+                    cache.put(key+(offset,), chunk)
+            pending.append((offset, chunk))
+
+            while len(pending) > limit:
+                yield _resolve_chunk(pending.popleft(), cache, key)
+
+        while pending:
+            yield _resolve_chunk(pending.popleft(), cache, key)
+    finally:
+        for _, chunk in pending:
+            if isinstance(chunk, Future):
+                chunk.cancel()
+
+def _resolve_chunk(entry, cache, key):
+    """Wait for a chunk to be decompressed and store it in the cache."""
+
+    offset, chunk = entry
+    if isinstance(chunk, Future):
+        chunk = chunk.result()
+        if cache is not None:
+            cache.put(key+(offset,), chunk)
+    return offset, chunk
+
+def _read_raw_chunk(dset, offset):
+    """Return tuple (filterMask, bytes) of a chunk as stored or None if it is not allocated."""
+
+    try:
+        if dset.id.get_chunk_info_by_coord(offset).byte_offset is None:
+            return None
+    except AttributeError:
+        pass  # older h5py
+    return dset.id.read_direct_chunk(offset)
+
+def _decode_and_crop(raw, filterMask, codes, dtype, shape, extent):
+    """Decode a chunk and crop it to the part inside the dataset."""
+
+    chunk = decode_chunk(raw, filterMask, codes, dtype, shape)
+    if any(s.stop != n for s, n in zip(extent, shape)):
+        chunk = np.ascontiguousarray(chunk[extent])
+    return chunk
+
+# filters that decode_chunk() can undo
+DECODABLE_FILTERS = (h5.h5z.FILTER_DEFLATE, h5.h5z.FILTER_SHUFFLE)
+
+# number of threads for decompressing chunks
+DECOMPRESSION_THREADS = os.cpu_count() or 1
+
+_pool = None
+_poolLock = threading.Lock()
+
+def _decompression_pool():
+    """Return the thread pool used for decompressing chunks, create it if necessary."""
+
+    global _pool
+    with _poolLock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=DECOMPRESSION_THREADS,
+                                       thread_name_prefix="h5sh-decompress")
+        return _pool
+
+def can_decode(dset):
+    """Return True if the chunks of a dataset can be decoded by decode_chunk()."""
+
+    return bool(dset.chunks) and not dset.dtype.hasobject \
+        and dset.id.get_type().get_size() == dset.dtype.itemsize \
+        and all(code in DECODABLE_FILTERS for code, _, _ in filters(dset))
+
+def decode_chunk(raw, filterMask, codes, dtype, shape):
+    """
+    Undo the filters applied to a chunk as stored in the file.
+    Only deflate and shuffle are supported. zlib and NumPy release the GIL,
+    so this can run in parallel threads.
+
+    :param raw: Bytes of the chunk as read by read_direct_chunk().
+    :param filterMask: Filter mask of the chunk; set bits denote skipped filters.
+    :param codes: Codes of the filters of the dataset in the order they are applied.
+    :param dtype: dtype of the dataset.
+    :param shape: Shape of chunks of the dataset.
+
+    :returns: Read-only array of given shape.
+    """
+
+    for i in reversed(range(len(codes))):
+        if filterMask & (1 << i):
+            continue
+        if codes[i] == h5.h5z.FILTER_DEFLATE:
+            raw = zlib.decompress(raw)
+        elif codes[i] == h5.h5z.FILTER_SHUFFLE:
+            raw = _unshuffle(raw, dtype.itemsize)
+        else:
+            raise ValueError("Unsupported filter: {}".format(codes[i]))
+    return np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+def _unshuffle(raw, itemsize):
+    """Undo the shuffle filter of HDF5."""
+
+    if itemsize == 1:
+        return raw
+    data = np.frombuffer(raw, dtype=np.uint8)
+    n = len(data)//itemsize
+    result = np.empty_like(data)
+    # the filter stores all first bytes, then all second bytes, and so on
+    result[:n*itemsize] = data[:n*itemsize].reshape(itemsize, n).T.reshape(-1)
+    result[n*itemsize:] = data[n*itemsize:]
+    return result
+
+def _finite_values(block):
+    """Return block as flat array of finite numbers."""
+
+    values = block.reshape(-1)
+    if values.dtype.kind == "b":
+        return values.astype(np.uint8)
+    if values.dtype.kind == "f":
+        return values[np.isfinite(values)]
+    return values
+
+def value_range(dset, slices, check=None):
+    """
+    Compute the minimum and maximum of the finite values in a selection of a dataset.
+
+    :returns: Tuple (min, max) or None if there are no finite values.
+    """
+
+    low = high = None
+    for _, _, block in read_blocks(dset, slices, check):
+        values = _finite_values(block)
+        if values.size:
+            low = values.min() if low is None else min(low, values.min())
+            high = values.max() if high is None else max(high, values.max())
+    return None if low is None else (low, high)
+
+def histogram(dset, slices, bins, valueRange, check=None):
+    """
+    Compute a histogram of the finite values in a selection of a dataset,
+    block by block.
+
+    :param bins: Number of bins.
+    :param valueRange: Tuple of lower and upper edge of the histogram.
+
+    :returns: Tuple of counts and edges as returned by numpy.histogram().
+    """
+
+    edges = np.histogram_bin_edges([], bins=bins, range=valueRange)
+    counts = np.zeros(bins, dtype=np.int64)
+    for _, _, block in read_blocks(dset, slices, check):
+        counts += np.histogram(_finite_values(block), bins=edges)[0]
+    return counts, edges
+
+def envelope(dset, slices, ncolumns, check=None):
+    """
+    Downsample a selection of a dataset to the minimum and maximum
+    of consecutive ranges of elements, block by block.
+    The selection is flattened in C order. NaNs are ignored.
+
+    :param ncolumns: Number of ranges, at most the number of selected elements.
+
+    :returns:
+        Tuple (bounds, mins, maxs) where the range of column i extends from bounds[i]
+        to bounds[i+1]. Columns without values have a minimum of inf and
+        a maximum of -inf.
+    """
+
+    n = int(np.prod(selection_shape(slices), dtype=np.int64))
+    ncolumns = min(ncolumns, n)
+    # first element of each column, rounded up
+    bounds = -(-np.arange(ncolumns+1, dtype=np.int64)*n//max(ncolumns, 1))
+    mins = np.full(ncolumns, np.inf)
+    maxs = np.full(ncolumns, -np.inf)
+
+    pos = 0  # position of block in flattened selection
+    for _, _, block in read_blocks(dset, slices, check):
+        values = block.reshape(-1).astype(np.float64)
+        first = pos*ncolumns//n
+        last = (pos+values.size-1)*ncolumns//n
+        starts = np.maximum(bounds[first:last+1], pos)-pos
+        mins[first:last+1] = np.fmin(mins[first:last+1], np.fmin.reduceat(values, starts))
+        maxs[first:last+1] = np.fmax(maxs[first:last+1], np.fmax.reduceat(values, starts))
+        pos += values.size
+    return bounds, mins, maxs
+
+def hash_dataset(dset, check=None):
+    """
+    Compute a digest of the shape, dtype and contents of a dataset.
+
+    :param dset: h5py Dataset to hash.
+    :param check: Function to call between blocks, e.g. to check for cancellation.
+    :returns: Hex digest as a string.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(str(dset.dtype).encode("utf-8"))
+    digest.update(str(dset.shape).encode("utf-8"))
+
+    if dset.shape is None:
+        return digest.hexdigest()
+    for _, _, block in read_blocks(dset, [slice(0, n, 1) for n in dset.shape], check):
+        if block.dtype.hasobject:
+            # variable length data, bytes of the array would be pointers
+            digest.update(repr(block.tolist()).encode("utf-8"))
+        else:
+            digest.update(block.data)
+    return digest.hexdigest()
+
+def digest_dataset(dset, check=None):
+    """
+    Compute a digest of a dataset for checking its integrity.
+    Chunked datasets are hashed based on their raw chunks as stored in the file
+    to avoid decompressing them. The digest thus changes if the same data is
+    stored with different filters.
+    Other datasets are hashed using hash_dataset().
+
+    :param dset: h5py Dataset to hash.
+    :param check: Function to call between chunks, e.g. to check for cancellation.
+    :returns: Hex digest as a string.
+    """
+
+    offsets = chunk_offsets(dset)
+    if offsets is None:
+        return hash_dataset(dset, check)
+
+    digest = hashlib.sha256()
+    digest.update(str(dset.dtype).encode("utf-8"))
+    digest.update(str(dset.shape).encode("utf-8"))
+    for offset in offsets:
+        if check:
+            check()
+        filterMask, chunk = dset.id.read_direct_chunk(offset)
+        digest.update(str((offset, filterMask)).encode("utf-8"))
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def chunk_offsets(dset):
+    """
+    Return sorted list of logical offsets of all allocated chunks of a dataset.
+    Returns None if the dataset is not chunked or the HDF5 library
+    does not support querying chunks.
+    """
+
+    infos = chunk_infos(dset)
+    if infos is None:
+        return None
+    return sorted(info.chunk_offset for info in infos)
+
+def chunk_infos(dset):
+    """
+    Return information on all allocated chunks of a dataset as stored in the file.
+    Does not read any chunks.
+
+    :returns:
+        List of objects with attributes chunk_offset, filter_mask, byte_offset and size
+        or None if the dataset is not chunked or the HDF5 library does not
+        support querying chunks.
+    """
+
+    if not dset.chunks:
+        return None
+
+    infos = []
+    try:
+        dset.id.chunk_iter(infos.append)
+    except (AttributeError, NotImplementedError):
+        # older h5py or HDF5, query chunks one by one
+        try:
+            infos = [dset.id.get_chunk_info(i) for i in range(dset.id.get_num_chunks())]
+        except (AttributeError, NotImplementedError):
+            return None
+    return infos
+
+def layout(dset):
+    """Return the storage layout of a dataset as a string."""
+
+    return {h5.h5d.COMPACT: "compact",
+            h5.h5d.CONTIGUOUS: "contiguous",
+            h5.h5d.CHUNKED: "chunked",
+            h5.h5d.VIRTUAL: "virtual"}.get(dset.id.get_create_plist().get_layout(), "unknown")
+
+def filters(dset):
+    """Return list of tuples (code, name, parameters) of filters applied to a dataset."""
+
+    dcpl = dset.id.get_create_plist()
+    result = []
+    for i in range(dcpl.get_nfilters()):
+        code, _, values, name = dcpl.get_filter(i)
+        result.append((code, name.decode("utf-8", "replace"), values))
+    return result
+
+def object_address(dset):
+    """Return the address of an object in its file."""
+    return h5.h5o.get_info(dset.id).addr
+
+def digest_datasets(fname, paths):
+    """
+    Compute digests of several datasets in a file using digest_dataset().
+    Meant to be run in a worker process.
+
+    :param fname: Name of the file.
+    :param paths: List of paths to datasets as strings.
+    :returns: List of digests in the same order as paths.
+    """
+
+    with h5.File(fname, "r") as f:
+        return [digest_dataset(f[path]) for path in paths]
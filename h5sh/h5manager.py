@@ -3,6 +3,7 @@ Backend to manage HDF5 files.
 """
 
 from enum import Enum
+import errno
 import fnmatch
 from posixpath import normpath
 import os.path
@@ -10,16 +11,50 @@ import calendar
 import time
 import sys
 import re
+import collections
+import contextlib
+import threading
 
 import h5py as h5
+import numpy as np
 
 from h5sh.util import split_path, abspath
+from h5sh.cancel import CancelToken, Cancelled
+from h5sh.h5data import ChunkCache, chunk_cache_parameters, object_address, read_fields, \
+    read_selection
+
+# default maximum size of the HDF5 chunk cache of each open dataset
+CHUNK_CACHE_BYTES = 64*1024*1024
+# default maximum size of decompressed chunks shared by all datasets
+CHUNK_LRU_BYTES = 256*1024*1024
+# maximum total size of the HDF5 chunk caches of all open datasets
+OPEN_DATASETS_BYTES = 4*CHUNK_CACHE_BYTES
+# maximum number of open datasets
+MAX_OPEN_DATASETS = 128
+# rough number of bytes of an H5Item and its entry in the parent's dict,
+# without name and shape
+ITEM_BYTES = 200
+
+class Counts(collections.namedtuple("Counts", ("groups", "datasets", "links",
+                                                 "dangling", "nbytes"))):
+    """
+    Aggregate numbers of items below a group: groups, datasets, links (soft and
+    external, including links to groups), dangling soft links and total logical
+    size of all datasets in bytes. Linked groups are not entered. Targets of
+    external links are not checked as that would require opening other files.
+    """
+
+    def __add__(self, other):
+        return Counts(*(a+b for a, b in zip(self, other)))
+
+Counts.zero = Counts(0, 0, 0, 0, 0)
 
 class H5Item:
     """
     Represent one HDF5 item. Which members are meaningful depends on the items kind:
     - dataset: name, kind, shape, dtype
-    - group: name, kind, children
+    - datatype (named datatype): name, kind, dtype
+    - group: name, kind, children, loaded, counts; target if reached through a link
     - hardLink, softLink: name, kind, target path (string)
     - externalLink: name, kind, target (tuple of filename and path (string) inside that file)
     """
@@ -31,9 +66,10 @@ class H5Item:
         hardLink     = 2
         softLink     = 3
         externalLink = 4
+        datatype     = 5
 
     def __init__(self, name, kind, children=None, shape=None, dtype=None,
-                 target=None, dangling=None):
+                 target=None, dangling=None, addr=None):
         self.name = name
         self.kind = kind
         self.children = children
@@ -43,94 +79,578 @@ class H5Item:
                               # (filename, path_inside_file) for externalLink
         self.dangling = dangling  # None for not dangling or "object" or "file"
                                   # to describe what does not exist
+        self.addr = addr  # address of the object in the file
+        self.loaded = False  # True once the children of a group have been read
+                             # or the target of an external link has been checked
+        self.counts = None  # Counts of everything below a group once known
+        self.pending = 0  # number of subgroups whose counts are not known yet
 
 
 class H5Manager:
     """
     Provides basic operations on HDF5 files.
+
+    The file is crawled group by group. By default, this happens in a background
+    thread which fills the cache while the manager can already be used. Lookups
+    load the groups they need on demand if the crawler has not reached them yet.
+
+    Long running operations check a :class:`~cancel.CancelToken` and raise
+    :class:`~cancel.Cancelled` when it is set. Groups are only added to the cache
+    once they are completely loaded so the cache stays consistent when that happens.
+
+    Datasets that are read stay open until the file is re-read so their HDF5 chunk
+    caches survive between commands. Decompressed chunks are additionally kept
+    in a :class:`~h5data.ChunkCache` shared by all datasets.
+
+    The memory used by the cache of groups can be bounded. When the bound is exceeded,
+    the least recently used groups are unloaded together with everything below them
+    and loaded again on demand. Groups on the path given to pin() are never unloaded.
+    The crawler stops once the cache is full.
+
+    In SWMR mode, the file is opened for single-writer-multiple-reader access and never
+    re-read. Instead, datasets that can grow are refreshed, which updates their shapes.
+    Each dataset is refreshed at most once per command, see start_command().
     """
 
-    def __init__(self, fname):
+    def __init__(self, fname, background=True, cancelToken=None,
+                 chunkCacheBytes=CHUNK_CACHE_BYTES, chunkLRUBytes=CHUNK_LRU_BYTES,
+                 maxCacheBytes=None, swmr=False):
         self._fname = None
-        self._cache = {}
+        self._swmr = swmr
+        self._growable = set()  # paths (tuples) of extendable datasets, only in SWMR mode
+        self._fresh = set()  # paths of datasets refreshed since the command started
+        self._allFresh = False  # True if all datasets were refreshed since then
+        self._root = H5Item("/", H5Item.Kind.group, children={})
         self._openTime = 0 # time the file was last opened (secs since epoch)
+        self._generation = 0  # incremented whenever the cached contents change
+
+        self._background = background
+        self._lock = threading.RLock()  # guards file access and loading of groups
+        self._file = None  # open file while crawling, None otherwise
+        self._dataFile = None  # file for reading contents of datasets, opened on demand
+        # maps paths (tuples) of open datasets to tuples of dataset and size
+        # of its chunk cache, least recently used first
+        self._datasets = collections.OrderedDict()
+        self._datasetBytes = 0  # total size of the chunk caches of open datasets
+        self._chunkCacheBytes = chunkCacheBytes
+        self._chunks = ChunkCache(chunkLRUBytes)
+        self._crawler = None
+        self._stopCrawl = CancelToken()
+        self._cancel = cancelToken if cancelToken is not None else CancelToken()
+        self._progress = [0, 0]  # number of loaded and known groups
+
+        self._maxCacheBytes = maxCacheBytes  # None for unbounded
+        self._cacheBytes = 0  # estimated size of all loaded groups
+        # maps paths (tuples) of loaded groups to tuples of item and size,
+        # least recently used first
+        self._loadedGroups = collections.OrderedDict()
+        self._pinned = {()}  # paths of groups that must not be unloaded
+        # counts lookups that use each path (tuple), these groups must not be unloaded either
+        self._inUse = collections.Counter()
+
+        # counters for instrumentation, see H5Manager.get_stats()
+        self._stats = dict.fromkeys(("objects loaded", "refreshes",
+                                     "stat calls", "cache hits", "groups evicted",
+                                     "dataset refreshes", "datasets closed"), 0)
 
         self.read_file(fname)
 
     def _clear_cache(self):
         """Empty out the cache"""
-        self._cache = {}
+        self._root = H5Item("/", H5Item.Kind.group, children={})
+        self._progress = [0, 1]
+        self._cacheBytes = 0
+        self._loadedGroups.clear()
+        self._growable.clear()
+        self._fresh.clear()
+        self._allFresh = False
+
+    def _open(self, fname):
+        """Open an HDF5 file for reading, in SWMR mode if requested."""
+
+        if self._swmr:
+            return h5.File(fname, "r", libver="latest", swmr=True)
+        return h5.File(fname, "r")
+
+    def start_command(self):
+        """
+        Mark the start of a command. In SWMR mode, datasets that were refreshed
+        by the previous command are refreshed again when they are used.
+        """
+
+        with self._lock:
+            self._fresh.clear()
+            self._allFresh = False
 
-    def refresh(self):
-        """Re-read file if it has changed since it was last read."""
+    def refresh(self, path=None):
+        """
+        Re-read file if it has changed since it was last read.
+        In SWMR mode, refresh datasets that can grow instead, only the one
+        at path if given.
+        Raises FileNotFoundError if the file was removed.
+        """
 
+        if self._swmr:
+            with self._lock:
+                if path is not None:
+                    self._refresh_dataset(tuple(path))
+                elif not self._allFresh:
+                    for growable in list(self._growable):
+                        self._refresh_dataset(growable)
+                    self._allFresh = True
+            return
+
+        self._stats["stat calls"] += 1
         try:
-            if os.path.getmtime(self._fname) > self._openTime:
-                self.read_file(self._fname)
+            mtime = os.path.getmtime(self._fname)
         except FileNotFoundError:
-            print("Error: file '{}' was removed.".format(self._fname))
-            sys.exit(1)
+            raise FileNotFoundError(errno.ENOENT, "File was removed", self._fname) from None
+        if mtime > self._openTime:
+            self._stats["refreshes"] += 1
+            self.read_file(self._fname)
+        else:
+            self._stats["cache hits"] += 1
 
     def read_file(self, fname):
-        """Read the HDF5 file. Preserves cache if file does not exist."""
+        """
+        Read the HDF5 file. Preserves cache if file does not exist.
+        Returns immediately if crawling in the background, otherwise
+        the whole file is loaded before returning.
+        """
+
+        f = self._open(fname)  # open first to keep cache if this fails
 
-        with h5.File(fname, "r") as f:
+        self._stop_crawler()
+        with self._lock:
+            self._close_file()
+            self._close_data_file()
+            self._file = f
             self._clear_cache()
+            self._generation += 1
             self._fname = fname
-            self._load_to_cache(f, self._cache)
             self._openTime = calendar.timegm(time.gmtime())
 
-    def _load_to_cache(self, group, cache):
-        """Load an HDF5 group and its children into cache."""
-        for k in group:
+        if self._background:
+            self._stopCrawl.reset()
+            self._crawler = threading.Thread(target=self._crawl, args=(self._stopCrawl,),
+                                             name="h5sh-crawler", daemon=True)
+            self._crawler.start()
+        else:
+            # remaining groups are loaded on demand if this gets cancelled
+            self._crawl(self._cancel, reraise=True)
+
+    def close(self):
+        """Stop crawling and release the file."""
+
+        self._stop_crawler()
+        with self._lock:
+            self._close_file()
+            self._close_data_file()
+
+    def _close_file(self):
+        """Close the file handle used for crawling. Must hold self._lock."""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _close_data_file(self):
+        """Close the file handle used for reading datasets. Must hold self._lock."""
+
+        self._datasets.clear()
+        self._datasetBytes = 0
+        self._chunks.clear()
+        if self._dataFile is not None:
+            self._dataFile.close()
+            self._dataFile = None
+
+    def _stop_crawler(self):
+        """Tell the crawler thread to stop and wait until it did."""
+
+        if self._crawler is not None:
+            self._stopCrawl.cancel()
+            self._crawler.join()
+            self._crawler = None
+
+    def _crawl(self, token, reraise=False):
+        """
+        Load all groups of the file breadth first.
+        Stops early if token is cancelled; raises Cancelled in that case
+        if reraise is True.
+        Groups reached through links are not entered, neither are groups that
+        were already visited under another name (hard links); both can still be
+        loaded on demand.
+        """
+
+        root = self._root
+        queue = collections.deque([([], root)])
+        with self._lock:
+            visited = {h5.h5o.get_info(self._file["/"].id).addr}
+        while queue:
+            path, item = queue.popleft()
+            # hold the lock only for one group at a time to keep lookups responsive
+            with self._lock:
+                if root is not self._root:
+                    return  # cache was replaced
+                if self._cache_full():
+                    # everything else is loaded on demand
+                    self._evict(set())
+                    self._close_file()
+                    return
+                if not self._is_attached(item, path):
+                    continue  # an ancestor was unloaded
+                try:
+                    self._ensure_loaded(item, path, token, evict=False)
+                except Cancelled:
+                    if reraise:
+                        raise
+                    return
+
+            for name, child in item.children.items():
+                if _is_subgroup(child) and child.addr not in visited:
+                    visited.add(child.addr)
+                    queue.append((path+[name], child))
+
+        with self._lock:
+            if root is self._root:
+                # everything reachable is in the cache now
+                self._close_file()
+                self._progress[1] = self._progress[0]
+
+    @contextlib.contextmanager
+    def _h5file(self):
+        """
+        Context manager providing an open handle to the file.
+        Reuses the crawler's handle if possible. Must hold self._lock.
+        """
+
+        if self._file is not None:
+            yield self._file
+        else:
+            with self._open(self._fname) as f:
+                yield f
+
+    def _ensure_loaded(self, item, path, token=None, evict=True):
+        """
+        Make sure that the children of group item at path are in the cache.
+        Uses the manager's cancel token unless another token is given.
+        Unloads other groups if the cache gets too large unless evict is False.
+        """
+
+        if item.loaded:
+            self._touch(path)
+            return
+
+        if token is None:
+            token = self._cancel
+
+        with self._lock:
+            if item.loaded:  # someone else was faster
+                return
+
+            with self._h5file() as f:
+                group = f["/"+"/".join(path)]
+                children = {}
+                self._load_group(group, children, token, path)
+
+            # publish all children at once
+            item.children = children
+            item.loaded = True
+            self._progress[0] += 1
+            self._progress[1] += sum(1 for child in children.values()
+                                     if child.kind == H5Item.Kind.group)
+
+            # subgroups complete the counts of this group once their counts are known
+            item.pending = sum(1 for child in children.values()
+                               if _is_subgroup(child) and child.counts is None)
+            if item.counts is None and item.pending == 0:
+                self._finish_counts(item, path)
+
+            nbytes = sys.getsizeof(children)+sum(_item_bytes(name, child)
+                                                 for name, child in children.items())
+            # an item that was detached by unloading an ancestor may have been loaded before
+            _, oldBytes = self._loadedGroups.pop(tuple(path), (None, 0))
+            self._loadedGroups[tuple(path)] = (item, nbytes)
+            self._cacheBytes += nbytes-oldBytes
+            if evict:
+                # keep the path that is currently being looked up
+                self._evict({tuple(path[:i]) for i in range(len(path)+1)})
+
+    def _finish_counts(self, item, path):
+        """
+        Compute the counts of loaded group item at path whose subgroups all have
+        counts and propagate to its ancestors as far as possible. Must hold self._lock.
+        """
+
+        item.counts = sum((_own_counts(child)+(child.counts if _is_subgroup(child) else Counts.zero)
+                           for child in item.children.values()), Counts.zero)
+        if not path or not _is_subgroup(item):
+            # linked groups are counted as links, their parents do not wait for them
+            return
+
+        parent = self._root
+        for name in path[:-1]:
+            parent = parent.children.get(name) if parent.loaded else None
+            if parent is None:
+                return
+        if parent.loaded and parent.children.get(path[-1]) is item \
+           and parent.counts is None and parent.pending > 0:
+            parent.pending -= 1
+            if parent.pending == 0:
+                self._finish_counts(parent, path[:-1])
+
+    def get_counts(self, path):
+        """
+        Return the Counts of everything below the group at path.
+        This is immediate if the counts were determined while crawling,
+        otherwise missing groups are loaded.
+        Arguments:
+            path (:obj:`list`): Path to the group, empty for root.
+        Returns:
+            Counts or None if there is no group at path.
+        """
+
+        self.refresh()
+        item = self._find(path)
+        if item is None or item.kind != H5Item.Kind.group:
+            return None
+        return self._count(item, path)
+
+    def _count(self, item, path):
+        """Return the Counts of group item at path, loading groups as needed."""
+
+        if item.counts is not None:
+            return item.counts
+
+        self._cancel.check()
+        with self._using(path):
+            while True:
+                self._ensure_loaded(item, path)
+                with self._lock:
+                    if item.loaded and self._is_attached(item, path):
+                        children = list(item.children.items())
+                        break
+                # unloaded by the crawler before the path was in use, look it up again
+                item = self._find(path)
+                if item is None or not _is_subgroup(item):
+                    return Counts.zero
+
+            counts = Counts.zero
+            for name, child in children:
+                counts += _own_counts(child)
+                if _is_subgroup(child):
+                    counts += self._count(child, path+[name])
+            with self._lock:
+                item.counts = counts
+        return counts
+
+    def _touch(self, path):
+        """Mark loaded group at path as recently used."""
+
+        if self._maxCacheBytes is not None:
+            with self._lock:
+                if tuple(path) in self._loadedGroups:
+                    self._loadedGroups.move_to_end(tuple(path))
+
+    def _cache_full(self):
+        """Return True if the cache has reached its maximum size."""
+        return self._maxCacheBytes is not None and self._cacheBytes >= self._maxCacheBytes
+
+    def _is_attached(self, item, path):
+        """Return True if item is the item at path in the cache. Must hold self._lock."""
+
+        current = self._root
+        for name in path:
+            if not current.loaded or name not in current.children:
+                return False
+            current = current.children[name]
+        return current is item
+
+    def _evict(self, keep):
+        """
+        Unload least recently used groups until the cache fits into its maximum size.
+        Must hold self._lock.
+        Arguments:
+            keep (:obj:`set`): Paths (tuples) of groups to keep in addition to pinned ones.
+        """
+
+        if self._maxCacheBytes is None:
+            return
+
+        keep = keep | self._pinned | self._inUse.keys()
+        while self._cacheBytes > self._maxCacheBytes \
+              and len(self._loadedGroups) > len(keep & self._loadedGroups.keys()):
+            path, (item, _) = next(iter(self._loadedGroups.items()))
+            if path in keep:
+                self._loadedGroups.move_to_end(path)
+                continue
+            self._unload(item, path)
+
+    @contextlib.contextmanager
+    def _using(self, path):
+        """
+        Context manager protecting the group at path and all its ancestors from
+        being unloaded, e.g. by the crawler, while a lookup traverses them.
+        """
+
+        paths = collections.Counter(tuple(path[:i]) for i in range(len(path)+1))
+        with self._lock:
+            self._inUse += paths
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._inUse -= paths
+
+    def _unload(self, item, path):
+        """Unload group item at path (tuple) and all loaded groups below it. Must hold self._lock."""
+
+        for name, child in item.children.items():
+            if child.kind == H5Item.Kind.group and child.loaded:
+                self._unload(child, path+(name,))
+
+        _, nbytes = self._loadedGroups.pop(path, (None, 0))
+        self._cacheBytes -= nbytes
+        self._stats["groups evicted"] += 1
+        # replace instead of clearing, the old dict may still be in use
+        item.children = {}
+        item.loaded = False
+
+    def pin(self, path):
+        """
+        Protect the group at path and all its ancestors from being unloaded.
+        Replaces the previously pinned path.
+        Arguments:
+            path (:obj:`list`): Path to the group, usually the working directory.
+        """
+
+        with self._lock:
+            self._pinned = {tuple(path[:i]) for i in range(len(path)+1)}
+
+    def get_cache_size(self):
+        """Return a tuple of the number of loaded groups and their estimated size in bytes."""
+        return len(self._loadedGroups), self._cacheBytes
+
+    def _load_group(self, group, cache, token, path):
+        """
+        Load the children of an HDF5 group at path into cache; does not recurse.
+        Checks token after each child.
+
+        Links are enumerated in one pass together with their types.
+        Objects are not opened except for datasets to read their shape and dtype.
+        Targets of external links are not touched, see _resolve_external().
+        """
+
+        links = []
+        group.id.links.iterate(lambda name, info: links.append((name, info.type)), info=True)
+
+        for bname, linkType in links:
+            token.check()
+            self._stats["objects loaded"] += 1
+            k = bname.decode("utf-8")
+
+            if linkType == h5.h5l.TYPE_EXTERNAL:
+                fname, path = group.id.links.get_val(bname)
+                cache[k] = H5Item(k, H5Item.Kind.externalLink,
+                                  target=(fname.decode("utf-8"), path.decode("utf-8")))
+                continue
+
             try:
-                # attempt to get the item
-                item = group[k]
-            except KeyError as error:
-                # should only fail if a link dangles
-                self._load_dangling(k, error, group.get(k, getlink=True), cache)
+                # follows soft links
+                info = h5.h5o.get_info(group.id, bname)
+            except (KeyError, RuntimeError):
+                # should only fail if a soft link dangles
+                if linkType != h5.h5l.TYPE_SOFT:
+                    raise
+                cache[k] = H5Item(k, H5Item.Kind.softLink,
+                                  target=group.id.links.get_val(bname).decode("utf-8"),
+                                  dangling="object")
                 continue
 
-            if isinstance(item, h5.Group):
-                cch = {}
-                self._load_to_cache(item, cch)
-                cache[k] = H5Item(k, H5Item.Kind.group, children=cch)
+            if info.type == h5.h5o.TYPE_GROUP:
+                cache[k] = H5Item(k, H5Item.Kind.group, children={}, addr=info.addr,
+                                  target=group.id.links.get_val(bname).decode("utf-8")
+                                  if linkType == h5.h5l.TYPE_SOFT else None)
+            elif linkType == h5.h5l.TYPE_SOFT:
+                cache[k] = H5Item(k, H5Item.Kind.softLink,
+                                  target=group.id.links.get_val(bname).decode("utf-8"))
+            # further hard links to an object are listed like the object itself,
+            # users that must visit objects once compare item.addr
+            elif info.type == h5.h5o.TYPE_DATASET:
+                dsid = h5.h5d.open(group.id, bname)
+                cache[k] = H5Item(k, H5Item.Kind.dataset, shape=dsid.shape, dtype=dsid.dtype,
+                                  addr=info.addr)
+                if self._swmr and dsid.shape is not None \
+                   and dsid.get_space().get_simple_extent_dims(True) != dsid.shape:
+                    self._growable.add(tuple(path)+(k,))
             else:
-                # get link class
-                lnk = group.get(k, getlink=True)
+                # named datatype
+                cache[k] = H5Item(k, H5Item.Kind.datatype,
+                                  dtype=h5.h5t.open(group.id, bname).dtype, addr=info.addr)
 
-                if isinstance(lnk, h5.SoftLink):
-                    cache[k] = H5Item(k, H5Item.Kind.softLink, target=lnk.path)
-                elif isinstance(lnk, h5.ExternalLink):
-                    cache[k] = H5Item(k, H5Item.Kind.externalLink,
-                                      target=(lnk.filename, lnk.path))
+    def _resolve_external(self, group, name, path):
+        """
+        Check the target of an external link in a loaded group.
+        Links to groups are replaced by groups so they can be browsed.
+        Only touches the target once.
 
-                # TODO check for hard links
+        Arguments:
+            group (:obj:`H5Item`): Loaded group containing the link.
+            name (str): Name of the link in group.
+            path (:obj:`list`): Path to group.
+        Returns:
+            The (possibly replaced) item.
+        """
+
+        item = group.children[name]
+        if item.kind != H5Item.Kind.externalLink or item.loaded:
+            return item
+
+        with self._lock:
+            item = group.children[name]
+            if item.kind != H5Item.Kind.externalLink or item.loaded:
+                return item
+
+            with self._h5file() as f:
+                try:
+                    target = f["/"+"/".join(path+[name])]
+                except KeyError as error:
+                    # find the reason why it dangles
+                    if re.match(r".*(Unable to open external file|can't open file)",
+                                error.args[0]):
+                        item.dangling = "file"  # file does not exist
+                    else:
+                        item.dangling = "object"  # object in file does not exist
+                    item.loaded = True
+                    return item
+
+                if isinstance(target, h5.Group):
+                    item = H5Item(name, H5Item.Kind.group, children={},
+                                  addr=h5.h5o.get_info(target.id).addr, target=item.target)
+                    group.children[name] = item
                 else:
-                    cache[k] = H5Item(k, H5Item.Kind.dataset,
-                                      shape=item.shape, dtype=item.dtype)
+                    item.loaded = True
+        return item
 
-    def _load_dangling(self, key, error, lnk, cache):
-        """Load a dangling link into cache."""
+    def _resolve_all_external(self, group, path):
+        """Check targets of all external links in loaded group at path."""
 
-        if isinstance(lnk, h5.SoftLink):
-            cache[key] = H5Item(key, H5Item.Kind.softLink,
-                                target=lnk.path, dangling="object")
+        for name, item in list(group.children.items()):
+            if item.kind == H5Item.Kind.externalLink and not item.loaded:
+                self._resolve_external(group, name, path)
 
-        elif isinstance(lnk, h5.ExternalLink):
-            # find the reason why it dangles
-            if re.match(r".*Unable to open external file", error.args[0]):
-                dngl = "file"  # file does not exist
-            else:
-                dngl = "object"  # object in file does not exist
+    def get_crawl_progress(self):
+        """
+        Return progress of the background crawl.
 
-            cache[key] = H5Item(key, H5Item.Kind.externalLink,
-                                target=(lnk.filename, lnk.path), dangling=dngl)
+        :returns:
+            None if the crawl is finished, otherwise a tuple of the number of
+            groups loaded so far and the number of groups known so far.
+        """
 
-        else:
-            # something is seriously wrong if we get here
-            print("Error reading file at object '{}': {}".format(key, error.args[0]))
-            sys.exit(1)
+        if self._crawler is None or not self._crawler.is_alive():
+            return None
+        return tuple(self._progress)
 
     def get_items(self, wd, *spaths):
         """
@@ -148,7 +668,7 @@ class H5Manager:
         result = []
         for spath in spaths:
             p = abspath(wd, [e for e in split_path(normpath(spath)) if e])
-            self._get_items(p, self._cache, result, [])
+            self._get_items(p, self._root, result, [])
 
         return result
 
@@ -167,34 +687,247 @@ class H5Manager:
             return None
 
         self.refresh()
+        return self._find(path)
 
-        result = []
-        # get parent of requested item
-        self._get_items(path[:-1], self._cache, result, [])
-        if not result:
-            # parent does not exist
+    def get_children(self, path):
+        """
+        Retrieve the children of a group.
+        Does not check whether the file has changed, call refresh() for that.
+        Arguments:
+            path (:obj:`list`): Path to the group, empty for root.
+        Returns:
+            Dict mapping names to items or None if there is no group at path.
+        """
+
+        with self._using(path):
+            group = self._find(path)
+            if group is None or group.kind != H5Item.Kind.group:
+                return None
+            self._ensure_loaded(group, path)
+            self._resolve_all_external(group, path)
+            return group.children
+
+    def walk(self, path):
+        """
+        Iterate over all groups below and including the group at path, depth first.
+        Groups that are reached through links are not entered, so every group
+        is visited once per hard link and cyclic links do not recurse.
+        Does not check whether the file has changed, call refresh() for that.
+        Arguments:
+            path (:obj:`list`): Path to the group to start at, empty for root.
+        Returns:
+            Generator of tuples (p, d) where d is a dict mapping names to the
+            children of the group at path p. Yields nothing if there is no group at path.
+        """
+
+        children = self.get_children(path)
+        if children is None:
+            return
+
+        self._cancel.check()
+        yield path, children
+        for name, item in sorted(children.items()):
+            if _is_subgroup(item):
+                yield from self.walk(path+[name])
+
+    def get_dataset(self, path):
+        """
+        Open a dataset to read its contents.
+        The dataset stays open until the file is re-read or the manager is closed
+        or it is the least recently used one when too many datasets are open.
+        Chunked datasets get a chunk cache sized by chunk_cache_parameters().
+        In SWMR mode, the dataset is refreshed once per command if it can grow.
+        Arguments:
+            path (:obj:`list`): Path to the dataset.
+        Returns:
+            h5py Dataset or None if there is no dataset at path.
+        """
+
+        key = tuple(path)
+        with self._lock:
+            dset = self._open_dataset(key)
+            if dset is not None:
+                self._refresh_dataset(key)
+            return dset
+
+    def _open_dataset(self, key):
+        """Return the open dataset at path key (tuple) or None. Must hold self._lock."""
+
+        entry = self._datasets.get(key)
+        if entry is not None:
+            self._datasets.move_to_end(key)
+            return entry[0]
+
+        if self._dataFile is None:
+            self._dataFile = self._open(self._fname)
+        spath = "/"+"/".join(key)
+        try:
+            dset = self._dataFile[spath]
+        except KeyError:
+            return None
+        if not isinstance(dset, h5.Dataset):
             return None
 
-        items = result[0][1]  # all children of parent item
-        if not items or not path[-1] in items:
-            # there are no children or the one we want is not in there
+        nbytes = 0
+        if dset.chunks:
+            # reopen with a chunk cache that fits the dataset
+            dapl = h5.h5p.create(h5.h5p.DATASET_ACCESS)
+            nslots, nbytes = chunk_cache_parameters(dset, self._chunkCacheBytes)
+            dapl.set_chunk_cache(nslots, nbytes, 0.0)
+            dset = h5.Dataset(h5.h5d.open(self._dataFile.id, spath.encode("utf-8"),
+                                          dapl=dapl))
+
+        # close least recently used datasets, always keep the new one
+        while self._datasets and (len(self._datasets) >= MAX_OPEN_DATASETS
+                                  or self._datasetBytes+nbytes > OPEN_DATASETS_BYTES):
+            # h5py closes the dataset and frees its chunk cache once no command uses it,
+            # closing it right away would break other threads that still read it
+            _, (_, oldBytes) = self._datasets.popitem(last=False)
+            self._datasetBytes -= oldBytes
+            self._stats["datasets closed"] += 1
+
+        self._datasets[key] = (dset, nbytes)
+        self._datasetBytes += nbytes
+        return dset
+
+    def _refresh_dataset(self, key):
+        """
+        Refresh the dataset at path key (tuple) if it can grow and was not refreshed
+        during the current command. Updates its shape as well as the sizes in
+        the counts of its groups. Must hold self._lock.
+        """
+
+        if key not in self._growable or key in self._fresh:
+            return
+        self._fresh.add(key)
+        dset = self._open_dataset(key)
+        if dset is None:
+            return
+
+        oldShape = dset.shape
+        dset.refresh()
+        self._stats["dataset refreshes"] += 1
+        if dset.shape != oldShape:
+            # cached chunks at the end may have been incomplete
+            self._chunks.discard((dset.file.filename, object_address(dset)))
+            self._update_shape(key, dset.shape)
+            self._generation += 1
+
+    def _update_shape(self, path, shape):
+        """Set the shape of the cached dataset item at path. Must hold self._lock."""
+
+        item = self._root
+        ancestors = []
+        for name in path:
+            if not item.loaded or name not in item.children:
+                # not cached, read with its current shape when loaded
+                return
+            ancestors.append(item)
+            item = item.children[name]
+
+        delta = (int(np.prod(shape, dtype=np.int64))
+                 -int(np.prod(item.shape, dtype=np.int64)))*item.dtype.itemsize
+        item.shape = shape
+        for group in ancestors:
+            if group.counts is not None:
+                group.counts = group.counts._replace(nbytes=group.counts.nbytes+delta)
+
+    def wait(self, seconds):
+        """
+        Sleep for the given time or until cancellation is requested.
+        Raises Cancelled in the latter case.
+        """
+        self._cancel.wait(seconds)
+
+    def get_attributes(self, path):
+        """
+        Read all attributes of an object.
+        Arguments:
+            path (:obj:`list`): Path to the object, empty for root.
+        Returns:
+            List of tuples of name and value or None if there is no object at path.
+            Attributes that cannot be read have the value None.
+        """
+
+        with self._lock:
+            if self._dataFile is None:
+                self._dataFile = self._open(self._fname)
+            try:
+                attrs = self._dataFile["/"+"/".join(path)].attrs
+            except (KeyError, OSError):
+                return None
+
+            result = []
+            for name in attrs:
+                try:
+                    result.append((name, attrs[name]))
+                except (OSError, TypeError, ValueError):
+                    # unsupported types or empty dataspaces
+                    result.append((name, None))
+            return result
+
+    def read_selection(self, path, slices):
+        """
+        Read a selection of a dataset using the shared cache of decompressed chunks.
+        Arguments:
+            path (:obj:`list`): Path to the dataset.
+            slices (:obj:`list`): Normalised slices as returned by util.parse_selection().
+        Returns:
+            NumPy array or None if there is no dataset at path.
+        """
+
+        dset = self.get_dataset(path)
+        if dset is None:
             return None
+        return read_selection(dset, slices, self._chunks, self.check_cancelled)
 
-        # found it
-        return items[path[-1]]
+    def read_fields(self, path, slices, fields):
+        """
+        Read some fields of a selection of a compound dataset, bypassing the chunk cache.
+        Arguments:
+            path (:obj:`list`): Path to the dataset.
+            slices (:obj:`list`): Normalised slices as returned by util.parse_selection().
+            fields (:obj:`list`): Names of fields to read.
+        Returns:
+            Dict of field name to NumPy array or None if there is no dataset at path.
+        """
 
-    def _get_items(self, path, cache, result, fullpath):
+        dset = self.get_dataset(path)
+        if dset is None:
+            return None
+        return read_fields(dset, slices, fields, self.check_cancelled)
+
+    def _find(self, path):
+        """Return item at path (list) or None if it does not exist. Returns root for []."""
+
+        item = self._root
+        with self._using(path):
+            for i, name in enumerate(path):
+                if item.kind != H5Item.Kind.group:
+                    return None
+                self._ensure_loaded(item, path[:i])
+                if name not in item.children:
+                    return None
+                item = self._resolve_external(item, name, path[:i])
+        return item
+
+    def _get_items(self, path, group, result, fullpath):
         """
         Recursively collect items.
         Arguments:
             path (:obj:`list`): Path to explore.
-            cache (:obj:`dict`): 'Directory' for current working directory.
+            group (:obj:`H5Item`): Group for current working directory.
             result (:obj:`list`): List of tuples (p, d), where d is a dict mapping names
                                   to items and p is the path to those items.
             fullpath (:obj:`list`): Path to items in current iteration (for internal use;
                                     init with empty list).
         """
 
+        self._cancel.check()
+        self._ensure_loaded(group, fullpath)
+        self._resolve_all_external(group, fullpath)
+        cache = group.children
+
         if not path:
             # path empty => store everything in cache
             result.append((fullpath, cache))
@@ -204,7 +937,7 @@ class H5Manager:
                 item = cache[name]
                 if item.kind == item.Kind.group:
                     # group: explore children and remember group name
-                    self._get_items(path[1:], item.children, result, fullpath+[name])
+                    self._get_items(path[1:], item, result, fullpath+[name])
                 else:
                     # anything else: remember item
                     items[name] = item
@@ -212,6 +945,75 @@ class H5Manager:
                 # store all (non-group) items in current path
                 result.append((fullpath, items))
 
+    def get_generation(self):
+        """
+        Return a number that changes whenever the file was re-read or,
+        in SWMR mode, a dataset changed its shape. Call refresh() first.
+        """
+        return self._generation
+
     def get_file_name(self):
         """Return the name of the opened file."""
         return self._fname
+
+    def check_cancelled(self):
+        """
+        Check whether the current operation shall be cancelled.
+        Commands should call this between chunks of work.
+
+        :raises: Cancelled if the cancel token of the manager is set.
+        """
+        self._cancel.check()
+
+    def get_stats(self):
+        """
+        Return a copy of the instrumentation counters.
+        The result maps counter names to their values:
+            objects loaded: Number of items read from the file into the cache.
+            refreshes: Number of times the file was re-read because it changed.
+            stat calls: Number of times the modification time of the file was queried.
+            cache hits: Number of lookups that were served from the cache.
+            chunk cache hits: Number of chunks read from the cache of decompressed chunks.
+            chunk cache misses: Number of chunks that had to be read from the file.
+            groups evicted: Number of groups that were unloaded to bound the cache.
+            dataset refreshes: Number of times a dataset was refreshed in SWMR mode.
+            datasets closed: Number of datasets closed to bound the number of open datasets.
+            cache bytes: Estimated current size of the cache of groups.
+        """
+        stats = dict(self._stats)
+        stats["cache bytes"] = self._cacheBytes
+        stats["chunk cache hits"] = self._chunks.hits
+        stats["chunk cache misses"] = self._chunks.misses
+        return stats
+
+    def reset_stats(self):
+        """Set all instrumentation counters to zero."""
+        for key in self._stats:
+            self._stats[key] = 0
+        self._chunks.hits = 0
+        self._chunks.misses = 0
+
+
+def _item_bytes(name, item):
+    """Estimate the memory used by an item in the cache of its parent group."""
+
+    return ITEM_BYTES+sys.getsizeof(name) \
+        +(sys.getsizeof(item.shape) if item.shape is not None else 0)
+
+def _is_subgroup(item):
+    """Return True if item is a group that is not reached through a link."""
+    return item.kind == H5Item.Kind.group and item.target is None
+
+def _own_counts(item):
+    """Return the contribution of item itself to the Counts of its parent."""
+
+    if item.kind == H5Item.Kind.dataset:
+        nbytes = 0
+        if item.shape is not None and item.dtype is not None:
+            nbytes = int(np.prod(item.shape, dtype=np.int64))*item.dtype.itemsize
+        return Counts(0, 1, 0, 0, nbytes)
+    if _is_subgroup(item):
+        return Counts(1, 0, 0, 0, 0)
+    if item.kind == H5Item.Kind.datatype:
+        return Counts.zero
+    return Counts(0, 0, 1, 1 if item.kind == H5Item.Kind.softLink and item.dangling else 0, 0)
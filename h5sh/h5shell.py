@@ -3,12 +3,20 @@ Contains the shell.
 """
 
 import argparse
+import glob
 import shlex
+import signal
+import os
 import os.path
+import sys
 import pkg_resources
 
 from h5sh.commands import *
-from h5sh.h5manager import H5Manager
+from h5sh.h5manager import H5Manager, CHUNK_CACHE_BYTES, CHUNK_LRU_BYTES
+from h5sh.cancel import CancelToken, Cancelled
+from h5sh.batch import run_files, split_script
+from h5sh.server import Server
+from h5sh.client import default_socket_path
 
 
 # import best available terminal backend
@@ -22,6 +30,19 @@ except ImportError:
 
 VERSION = pkg_resources.require("h5sh")[0].version
 
+# file to store the history of entered commands in
+HISTORY_FILE = os.path.expanduser("~/.h5sh_history")
+HISTORY_LENGTH = 20000
+
+# database to store digests of datasets in
+DIGEST_FILE = os.path.expanduser("~/.h5sh_digests.sqlite")
+
+# database to store the index of metadata of files in
+INDEX_FILE = os.path.expanduser("~/.h5sh_index.sqlite")
+
+# database to store zone maps of datasets in
+ZONEMAP_FILE = os.path.expanduser("~/.h5sh_zonemaps.sqlite")
+
 
 def parse_args():
     """Parse command line arguments for h5sh."""
@@ -41,10 +62,58 @@ def parse_args():
                                      """,
                                      epilog="See https://github.com/jl-wynen/h5shell\
                                      for more information.")
-    parser.add_argument("FILE", help="HDF5 file to open")
+    parser.add_argument("FILE", nargs="?", help="HDF5 file to open")
+    parser.add_argument("--foreground-crawl", action="store_true",
+                        help="Read the whole file before showing the prompt\
+                        instead of crawling it in the background")
+    parser.add_argument("--chunk-cache", type=float, default=CHUNK_CACHE_BYTES/1024**2,
+                        metavar="MIB",
+                        help="Maximum size of the HDF5 chunk cache of each open dataset\
+                        in MiB (default: %(default)g)")
+    parser.add_argument("--chunk-lru", type=float, default=CHUNK_LRU_BYTES/1024**2,
+                        metavar="MIB",
+                        help="Maximum size of decompressed chunks kept between commands\
+                        in MiB (default: %(default)g)")
+    parser.add_argument("--tree-memory", type=float, metavar="MIB",
+                        help="Maximum memory for the cached structure of the file in MiB.\
+                        Least recently used groups are unloaded and read again when needed.\
+                        Unbounded by default.")
+    parser.add_argument("--swmr", action="store_true",
+                        help="Open files in SWMR mode to read them while they are being\
+                        written. Growing datasets are refreshed instead of re-reading the file.")
+    parser.add_argument("-c", "--command", metavar="SCRIPT",
+                        help="Run commands separated by ';' or newlines on the file(s)\
+                        and exit instead of starting an interactive shell")
+    parser.add_argument("--files", action="append", default=[], metavar="PATTERN",
+                        help="Run the commands given by -c on all files matching a glob\
+                        pattern, in parallel. Can be given multiple times.")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Number of processes for --files (number of CPUs by default)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Print the output of -c as one JSON object per file")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run a server that keeps recently used files open for\
+                        the client h5shc instead of starting an interactive shell")
+    parser.add_argument("--socket", default=default_socket_path(),
+                        help="Socket for --serve (default: %(default)s)")
     parser.add_argument("--version", nargs=0, action=VersionAction,
                         help="Show the version number")
-    return parser.parse_args()
+
+    args = parser.parse_args()
+    if args.files and args.command is None:
+        parser.error("--files requires -c")
+    if not args.FILE and not args.files and not args.serve:
+        parser.error("the following arguments are required: FILE")
+    return args
+
+def manager_options(args):
+    """Return dict of keyword arguments for H5Manager based on command line arguments."""
+
+    return {"chunkCacheBytes": int(args.chunk_cache*1024**2),
+            "chunkLRUBytes": int(args.chunk_lru*1024**2),
+            "maxCacheBytes": int(args.tree_memory*1024**2)
+                             if args.tree_memory is not None else None,
+            "swmr": args.swmr}
 
 
 class H5shell:
@@ -52,9 +121,14 @@ class H5shell:
     The actual shell which glues all pieces together.
     """
 
-    def __init__(self):
-        self._term = Term()
+    def __init__(self, term=None):
+        """
+        :param term: Terminal to use, by default the best available one with history.
+        """
+
+        self._term = term if term is not None else Term(HISTORY_FILE, HISTORY_LENGTH)
         self._wd = []
+        self._cancel = CancelToken()  # set when the user presses ctrl+c during a command
 
         # dict of available commands
         self._cmds = {
@@ -64,13 +138,33 @@ class H5shell:
             "open": open_file.open_file(),
             "ext": run_external.run_external(),
             "history": history.history(),
+            "time": run_timed.run_timed(self._execute),
+            "profile": run_profiled.run_profiled(self._execute),
+            "stats": show_stats.show_stats(),
+            "tree": tree.tree(),
+            "diff": diff.diff(),
+            "checksum": checksum.checksum(DIGEST_FILE),
+            "chunks": chunks.chunks(),
+            "export": export.export(),
+            "head": head.head(),
+            "peek": peek.peek(),
+            "hist": hist.hist(),
+            "plot": plot.plot(),
+            "count": count.count(),
+            "index": index.index(INDEX_FILE),
+            "query": query.query(INDEX_FILE),
+            "tail": tail.tail(),
+            "watch": watch.watch(self._execute),
+            "where": where.where(ZONEMAP_FILE),
         }
 
         # dict of aliases (evaluated before _cmds)
         self._aliases = {
             "..": "cd ..",
             "l": "ls -l",
-            "-": "ext"
+            "-": "ext",
+            "verify": "checksum --verify",
+            "sample": "peek --random",
         }
 
         self._cmds["help"] = show_help.show_help(VERSION, self._cmds, self._aliases, TERM_KIND)
@@ -80,6 +174,11 @@ class H5shell:
 
         prompt = ""
 
+        # show progress of background crawl
+        progress = h5mngr.get_crawl_progress()
+        if progress:
+            prompt += self._term.coloured("[{}/{}] ".format(*progress), self._term.Colour.iblack)
+
         # add file name and path
         filePath = os.path.split(h5mngr.get_file_name())
         if filePath[0]:
@@ -95,6 +194,39 @@ class H5shell:
 
         return prompt
 
+    def _execute(self, inp, h5mngr, term=None):
+        """
+        Execute a single command.
+
+        :param inp: Command and its arguments as a list of strings.
+        :param h5mngr: H5Manager to run the command on.
+        :param term: Terminal for output of the command, the shell's terminal by default.
+
+        :returns: False if the command does not exist, True otherwise.
+        """
+
+        if term is None:
+            term = self._term
+
+        if not inp:
+            return True
+
+        try:
+            # turn aliases into normal commands
+            inp = shlex.split(self._aliases[inp[0]]) + inp[1:]
+        except KeyError:
+            pass
+
+        try:
+            cmd = self._cmds[inp[0]]
+        except KeyError:
+            term.print("h5sh: {}: command not found".format(inp[0]))
+            return False
+
+        # execute command
+        cmd(inp[1:], self._wd, h5mngr, term)
+        return True
+
     def run(self):
         """
         Main REPL to run the shell.
@@ -102,24 +234,75 @@ class H5shell:
 
         self._wd = []
 
+        args = parse_args()
+        if args.serve:
+            server = Server(type(self), args.socket, manager_options(args))
+            print("h5sh: serving on {}".format(args.socket))
+            # terminate like on ctrl+c so that the socket is removed
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+            return
+
+        if args.command is not None:
+            fnames = ([args.FILE] if args.FILE else []) \
+                     + [fname for pattern in args.files for fname in sorted(glob.glob(pattern))]
+            try:
+                nfailed = run_files(type(self), fnames, split_script(args.command),
+                                    manager_options(args), args.jobs, args.ndjson)
+            except KeyboardInterrupt:
+                sys.exit(130)
+            sys.exit(1 if nfailed else 0)
+
         # 'open' the file
-        h5mngr = H5Manager(parse_args().FILE)
+        h5mngr = H5Manager(args.FILE, background=not args.foreground_crawl,
+                           cancelToken=self._cancel, **manager_options(args))
 
         while True:
+            # never unload the working directory
+            h5mngr.pin(self._wd)
             inp = shlex.split(self._term.get_input(self._build_prompt(h5mngr)))
 
             # special treatment for exit
             if inp and inp[0].strip() == "exit":
                 break
 
+            h5mngr.start_command()
             try:
-                # turn aliases into normal commands
-                inp = shlex.split(self._aliases[inp[0]]) + inp[1:]
-            except KeyError:
-                pass
+                # ctrl+c cancels the command instead of terminating the shell
+                with self._cancel.catch_interrupt():
+                    self._execute(inp, h5mngr)
+            except (Cancelled, KeyboardInterrupt):
+                self._term.print("")
+                self._term.print("h5sh: {}: interrupted".format(inp[0]))
+            except FileNotFoundError:
+                if os.path.exists(h5mngr.get_file_name()):
+                    raise
+                self._term.print("Error: file '{}' was removed.".format(h5mngr.get_file_name()))
+                sys.exit(1)
 
-            try:
-                # execute command
-                self._cmds[inp[0]](inp[1:], self._wd, h5mngr, self._term)
-            except KeyError:
-                self._term.print("h5sh: {}: command not found".format(inp[0]))
+        h5mngr.close()
+
+    def run_script(self, script, h5mngr):
+        """
+        Execute commands non-interactively until the end of the script or 'exit'.
+
+        :param script: List of commands, each a list of strings.
+        :param h5mngr: H5Manager to run the commands on.
+
+        :returns: Exit status, 127 if a command does not exist and 0 otherwise.
+        """
+
+        status = 0
+        for inp in script:
+            if inp[0] == "exit":
+                break
+            h5mngr.pin(self._wd)
+            h5mngr.start_command()
+            if not self._execute(inp, h5mngr):
+                status = 127
+        return status
@@ -0,0 +1,178 @@
+"""
+Persistent SQLite index of the metadata of HDF5 files.
+"""
+
+import os
+import sqlite3
+import time
+from urllib.parse import quote
+
+import h5py
+import numpy as np
+
+# number of rows inserted with one statement
+BATCH_ROWS = 10000
+
+class MetadataIndex:
+    """
+    Stores the tree of HDF5 files in an SQLite database to query it with SQL.
+
+    Every file is identified by its real path. The index of a file is replaced
+    as a whole when the file is indexed again and remembers the identity of the
+    file (see digests.file_identity()) to tell whether it is still up to date.
+    This way, the index is reused across sessions.
+
+    Queries see the following views, restricted to one file:
+     - items(path, parent, name, kind, shape, ndim, size, dtype, itemsize, nbytes,
+       target, dangling)
+     - attributes(path, name, value, dtype, shape)
+    """
+
+    def __init__(self, fname):
+        """
+        :param fname: Name of the database file. Created if it does not exist.
+        """
+
+        self._fname = fname
+        self._db = sqlite3.connect(fname)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+              id INTEGER PRIMARY KEY, fname TEXT UNIQUE, identity TEXT,
+              attributes INTEGER, time REAL);
+            CREATE TABLE IF NOT EXISTS all_items (
+              file INTEGER, path TEXT, parent TEXT, name TEXT, kind TEXT,
+              shape TEXT, ndim INTEGER, size INTEGER, dtype TEXT, itemsize INTEGER,
+              nbytes INTEGER, target TEXT, dangling TEXT,
+              PRIMARY KEY (file, path));
+            CREATE INDEX IF NOT EXISTS all_items_parent ON all_items (file, parent);
+            CREATE INDEX IF NOT EXISTS all_items_dtype ON all_items (file, dtype, nbytes);
+            CREATE INDEX IF NOT EXISTS all_items_nbytes ON all_items (file, nbytes);
+            CREATE TABLE IF NOT EXISTS all_attributes (
+              file INTEGER, path TEXT, name TEXT, value, dtype TEXT, shape TEXT,
+              PRIMARY KEY (file, path, name));
+            CREATE INDEX IF NOT EXISTS all_attributes_name ON all_attributes (file, name, value);
+            """)
+        self._db.commit()
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def state(self, fname):
+        """
+        Return a tuple of the identity of the file when it was last indexed and
+        whether attributes were indexed or None if the file was never indexed.
+        """
+
+        row = self._db.execute("SELECT identity, attributes FROM files WHERE fname=?",
+                               (os.path.realpath(fname),)).fetchone()
+        return (row[0], bool(row[1])) if row else None
+
+    def replace(self, fname, identity, items, attributes=None, check=None):
+        """
+        Replace the index of a file.
+        Nothing is changed if check raises an exception.
+
+        :param fname: Name of the file.
+        :param identity: Identity of the file.
+        :param items: Iterable of tuples (path, parent, name, kind, shape, ndim, size,
+                      dtype, itemsize, nbytes, target, dangling).
+        :param attributes: Iterable of tuples (path, name, value, dtype, shape)
+                           or None if attributes are not indexed.
+        :param check: Function called between batches, e.g. to check for cancellation.
+
+        :returns: Tuple of the numbers of items and attributes.
+        """
+
+        fname = os.path.realpath(fname)
+        with self._db:
+            row = self._db.execute("SELECT id FROM files WHERE fname=?", (fname,)).fetchone()
+            if row:
+                fileId = row[0]
+                self._db.execute("DELETE FROM all_items WHERE file=?", (fileId,))
+                self._db.execute("DELETE FROM all_attributes WHERE file=?", (fileId,))
+                self._db.execute("UPDATE files SET identity=?, attributes=?, time=? WHERE id=?",
+                                 (identity, attributes is not None, time.time(), fileId))
+            else:
+                fileId = self._db.execute("INSERT INTO files (fname, identity, attributes, time)"
+                                          " VALUES (?, ?, ?, ?)",
+                                          (fname, identity, attributes is not None,
+                                           time.time())).lastrowid
+
+            nitems = self._insert("INSERT INTO all_items VALUES"
+                                  " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  fileId, items, check)
+            nattributes = self._insert("INSERT OR REPLACE INTO all_attributes VALUES"
+                                       " (?, ?, ?, ?, ?, ?)",
+                                       fileId, attributes or (), check)
+        return nitems, nattributes
+
+    def _insert(self, statement, fileId, rows, check):
+        """Insert rows prefixed by fileId in batches. Returns the number of rows."""
+
+        nrows = 0
+        batch = []
+        for row in rows:
+            batch.append((fileId,)+tuple(row))
+            if len(batch) == BATCH_ROWS:
+                if check:
+                    check()
+                self._db.executemany(statement, batch)
+                nrows += len(batch)
+                batch = []
+        if check:
+            check()
+        self._db.executemany(statement, batch)
+        return nrows+len(batch)
+
+    def query(self, fname, sql):
+        """
+        Run an SQL statement against the index of a file.
+        The database is opened read only for this.
+
+        :returns:
+            Tuple of list of column names and cursor over the rows of the result.
+        """
+
+        row = self._db.execute("SELECT id FROM files WHERE fname=?",
+                               (os.path.realpath(fname),)).fetchone()
+        if not row:
+            raise KeyError(fname)
+
+        db = sqlite3.connect("file:{}?mode=ro".format(quote(self._fname)), uri=True)
+        db.execute("CREATE TEMP VIEW items AS SELECT path, parent, name, kind, shape, ndim,"
+                   " size, dtype, itemsize, nbytes, target, dangling"
+                   " FROM main.all_items WHERE file={:d}".format(row[0]))
+        db.execute("CREATE TEMP VIEW attributes AS SELECT path, name, value, dtype, shape"
+                   " FROM main.all_attributes WHERE file={:d}".format(row[0]))
+        cursor = db.execute(sql)
+        return [d[0] for d in cursor.description or ()], cursor
+
+
+def attribute_row(path, name, value):
+    """
+    Convert an attribute to a tuple (path, name, value, dtype, shape) for the index.
+    Numbers and strings are stored as such, everything else as text.
+    Attributes without value or that could not be read are stored as NULL.
+    """
+
+    if value is None:
+        return path, name, None, None, None
+    if isinstance(value, h5py.Empty):
+        return path, name, None, str(value.dtype), None
+    value = np.asarray(value)
+    shape = ",".join(str(n) for n in value.shape)
+    dtype = str(value.dtype)
+    if value.shape == ():
+        value = value[()]
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", "replace")
+        elif isinstance(value, (np.bool_, np.integer)):
+            value = int(value)
+        elif isinstance(value, np.floating):
+            value = float(value)
+        elif not isinstance(value, str):
+            value = str(value)
+    else:
+        value = str(value.tolist())
+    return path, name, value, dtype, shape
@@ -0,0 +1,214 @@
+"""
+Server that keeps files open and crawled for the thin client (see client.py).
+"""
+
+import collections
+import json
+import os
+import socket
+import socketserver
+import threading
+
+from h5sh.terminal import Terminal
+from h5sh.ascii_codes import ASCII
+from h5sh.h5manager import H5Manager
+from h5sh.batch import split_script
+
+# maximum number of files kept open by default
+MAX_FILES = 8
+
+class StreamTerminal(Terminal):
+    """
+    Terminal that sends output to a client as JSON messages.
+    Does not support input.
+    """
+
+    def __init__(self, stream, width=80, colour=False):
+        """
+        :param stream: Binary file-like object connected to the client.
+        :param width: Number of columns of the client's terminal.
+        :param colour: Send colour codes if True.
+        """
+
+        super(StreamTerminal, self).__init__()
+        self._stream = stream
+        self._width = width
+        self._colour = colour
+
+    def get_input(self, prompt):
+        """No input is available, always returns 'exit'."""
+        return "exit"
+
+    def print(self, *args, sep=" ", end="\n", **kwargs):
+        """Send something to the client."""
+        self.send({"out": sep.join(str(arg) for arg in args)+end})
+
+    def send(self, message):
+        """Send a message (dict) to the client."""
+
+        self._stream.write(json.dumps(message).encode("utf-8")+b"\n")
+        self._stream.flush()
+
+    def get_width(self):
+        """Return the number of columns of the client's terminal."""
+        return self._width
+
+    def coloured(self, string, colour):
+        """Return string with colour codes if the client wants them."""
+
+        if not self._colour:
+            return string
+        return chr(ASCII.ESC)+"["+str(colour)+"m"+string+chr(ASCII.ESC)+"[0m"
+
+
+class _Entry:
+    """An H5Manager kept by the server together with the lock for using it."""
+
+    def __init__(self, h5mngr):
+        self.h5mngr = h5mngr
+        self.lock = threading.Lock()  # held while running a script on the file
+        self.users = 0  # number of requests using or waiting for the manager
+        self.evicted = False  # True once the server no longer keeps the manager
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Runs scripts sent by clients on a Unix domain socket.
+
+    H5Managers of the most recently used files are kept, so their caches
+    stay warm between requests. They crawl in the background and re-read
+    their files when they change. Requests are handled in parallel
+    except for requests on the same file. Managers that are evicted or whose
+    files were removed are closed once their last request has finished, so a
+    long request like tail -f does not block requests on other files.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, shellType, socketPath, managerOptions, maxFiles=MAX_FILES):
+        """
+        :param shellType: Class of the shell to execute commands with.
+        :param socketPath: Path of the socket to listen on.
+        :param managerOptions: Dict of keyword arguments for H5Manager.
+        :param maxFiles: Maximum number of files to keep open.
+        """
+
+        self._shellType = shellType
+        self._managerOptions = managerOptions
+        self._maxFiles = maxFiles
+        self._lock = threading.Lock()  # guards _managers and the users of all entries
+        # maps file names to _Entry, least recently used first
+        self._managers = collections.OrderedDict()
+
+        _remove_stale_socket(socketPath)
+        # only the current user may connect
+        oldMask = os.umask(0o077)
+        try:
+            super(Server, self).__init__(socketPath, _Handler)
+        finally:
+            os.umask(oldMask)
+
+    def server_close(self):
+        """Close all files and remove the socket."""
+
+        super(Server, self).server_close()
+        with self._lock:
+            for entry in self._managers.values():
+                entry.h5mngr.close()
+            self._managers.clear()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+    def _acquire(self, fname):
+        """
+        Return the _Entry for file fname, creating a manager if necessary,
+        and count the caller as a user. Call _release() when done.
+        """
+
+        unused = []
+        with self._lock:
+            entry = self._managers.get(fname)
+            if entry is not None:
+                self._managers.move_to_end(fname)
+            else:
+                entry = _Entry(H5Manager(fname, **self._managerOptions))
+                self._managers[fname] = entry
+                while len(self._managers) > self._maxFiles:
+                    _, old = self._managers.popitem(last=False)
+                    old.evicted = True
+                    if old.users == 0:
+                        unused.append(old)
+            entry.users += 1
+
+        # managers in use are closed by their last user
+        for old in unused:
+            old.h5mngr.close()
+        return entry
+
+    def _release(self, fname, entry, discard=False):
+        """
+        Stop using an entry returned by _acquire().
+        If discard is True, the manager is not kept for later requests.
+        """
+
+        with self._lock:
+            entry.users -= 1
+            if discard and self._managers.get(fname) is entry:
+                del self._managers[fname]
+                entry.evicted = True
+            close = entry.evicted and entry.users == 0
+        if close:
+            entry.h5mngr.close()
+
+    def run(self, request, term):
+        """Run the script or arguments of a request and return the exit status."""
+
+        script = [request["args"]] if "args" in request else split_script(request["script"])
+        fname = os.path.realpath(request["file"])
+        entry = self._acquire(fname)
+        discard = False
+        try:
+            with entry.lock:
+                return self._shellType(term).run_script(script, entry.h5mngr)
+        except FileNotFoundError:
+            # the file was removed, open it again if it comes back
+            discard = True
+            raise
+        finally:
+            self._release(fname, entry, discard)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Handles one request of a client."""
+
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        term = StreamTerminal(self.wfile, request.get("width", 80), request.get("colour", False))
+        try:
+            term.send({"status": self.server.run(request, term)})
+        except (BrokenPipeError, ConnectionResetError):
+            # the client went away
+            pass
+        except Exception as e:
+            try:
+                term.send({"status": 1, "error": "{}: {}".format(type(e).__name__, e)})
+            except OSError:
+                pass
+
+
+def _remove_stale_socket(path):
+    """Remove the socket at path if no server is listening on it."""
+
+    if not os.path.exists(path):
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        os.remove(path)
+    else:
+        raise OSError("a server is already listening on {}".format(path))
+    finally:
+        sock.close()
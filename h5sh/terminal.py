@@ -1,4 +1,14 @@
 import shutil
+import os
+import collections
+import itertools
+import bisect
+
+try:
+    import fcntl
+    have_fcntl = True
+except ImportError:
+    have_fcntl = False
 
 class Terminal:
     """
@@ -10,20 +20,76 @@ class Terminal:
     class History:
         """
         Manages the history of entered commands.
-        The list can be accessed through History.history.
+
+        If a file name is given, the history is shared with other shells through that file.
+        New entries are appended to the file immediately, the file is read
+        lazily when the history is first needed.
         """
 
-        def __init__(self, maxLength=500):
-            self._history = []
+        def __init__(self, maxLength=500, fname=None):
+            self._history = collections.deque(maxlen=maxLength)
             self._maxLength = maxLength
             self._histPtr = 0
             self._current = ""
 
+            self._fname = fname
+            self._loaded = fname is None  # nothing to load without a file
+
+            # maps pairs of characters to absolute numbers of entries containing them,
+            # entry i of _history has absolute number i+_dropped
+            self._index = None  # built lazily by search()
+            self._dropped = 0
+
         def __nonzero__(self):
             """True if the history is non-empty."""
             
             return not self._history
 
+        def _load(self):
+            """Read the history file if that has not been done yet."""
+
+            if self._loaded:
+                return
+            self._loaded = True
+
+            try:
+                with open(self._fname, "r+", errors="replace") as f:
+                    if have_fcntl:
+                        fcntl.flock(f, fcntl.LOCK_EX)
+                    lines = f.read().splitlines()
+
+                    # keep the file from growing indefinitely
+                    if len(lines) > 2*self._maxLength:
+                        lines = lines[-self._maxLength:]
+                        f.seek(0)
+                        f.truncate()
+                        f.write("".join(line+"\n" for line in lines))
+            except FileNotFoundError:
+                return
+            except OSError:
+                # not being able to read the history is no reason to fail
+                return
+
+            self._history.extend(line for line in lines if line)
+            self._histPtr = len(self._history)
+
+        def _write(self, item):
+            """Append an item to the history file."""
+
+            try:
+                fd = os.open(self._fname, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            except OSError:
+                return
+            try:
+                if have_fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                # a single write in append mode does not interleave with other shells
+                os.write(fd, (item+"\n").encode("utf-8"))
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
         def back(self, current):
             """
             Move back one element in the history.
@@ -36,6 +102,7 @@ class Terminal:
                 Item in the history after moving back one step.
             """
 
+            self._load()
             if self._histPtr == 0:
                 raise IndexError("Tried to go beyond start of history.")
             if self._histPtr == len(self._history):
@@ -63,13 +130,22 @@ class Terminal:
         def append(self, item):
             """Append a new item to the history and move the history pointer to the end."""
 
+            self._load()
+            item = item.replace("\n", " ")
             if not self._history or item != self._history[-1]:
+                if len(self._history) == self._maxLength:
+                    # deque drops the oldest item
+                    self._dropped += 1
                 self._history.append(item)
-                self._histPtr = len(self._history)
-            # overflow length => crop list
-            if len(self._history) > self._maxLength:
-                self._history = self._history[1:]
-                self._histPtr -= 1
+                self._add_to_index(item, len(self._history)-1+self._dropped)
+
+                if self._fname:
+                    self._write(item)
+
+                # get rid of index entries for dropped items from time to time
+                if self._dropped >= self._maxLength:
+                    self._index = None
+            self._histPtr = len(self._history)
 
         def reset(self):
             """Reset all changes done by History.back() and History.forward()."""
@@ -77,12 +153,68 @@ class Terminal:
             self._current = ""
             self._histPtr = len(self._history)
 
+        def _add_to_index(self, item, number):
+            """Add item with absolute number to the search index if it exists."""
+
+            if self._index is not None:
+                for pair in {item[i:i+2] for i in range(len(item)-1)}:
+                    self._index.setdefault(pair, []).append(number)
+
+        def _build_index(self):
+            """Build the search index from scratch."""
+
+            self._index = {}
+            self._dropped = 0
+            for i, item in enumerate(self._history):
+                self._add_to_index(item, i)
+
+        def search(self, query, before=None):
+            """
+            Find the most recent item containing query.
+
+            :param query: String to search for.
+            :param before: Only consider items with an index less than before.
+                           Searches the whole history by default.
+
+            :returns:
+                Tuple of index and item or None if nothing matches.
+            """
+
+            self._load()
+            if before is None or before > len(self._history):
+                before = len(self._history)
+            if not query or before <= 0:
+                return None
+
+            if len(query) == 1:
+                # too short for the index, search linearly from the end
+                for i, item in enumerate(itertools.islice(reversed(self._history),
+                                                          len(self._history)-before, None)):
+                    if query in item:
+                        return before-1-i, item
+                return None
+
+            if self._index is None:
+                self._build_index()
+
+            # only look at items containing the rarest pair of characters of query
+            candidates = min((self._index.get(query[i:i+2], []) for i in range(len(query)-1)),
+                             key=len)
+            for j in range(bisect.bisect_left(candidates, before+self._dropped)-1, -1, -1):
+                i = candidates[j]-self._dropped
+                if i < 0:
+                    break  # item has been dropped
+                if query in self._history[i]:
+                    return i, self._history[i]
+            return None
+
         def dump(self, showNumbers=True):
             """Return a string representation of the history."""
             
+            self._load()
             if showNumbers:
-                return "\r\n".join("{:5d}  {:s}".format(i, self._history[i])
-                                   for i in range(len(self._history)))
+                return "\r\n".join("{:5d}  {:s}".format(i, item)
+                                   for i, item in enumerate(self._history))
 
             return "\r\n ".join("{:s}".format(item)
                                 for item in self._history)
@@ -110,8 +242,12 @@ class Terminal:
         iwhite  = 97
 
 
-    def __init__(self):
-        self.history = self.History()
+    def __init__(self, historyFile=None, historyLength=500):
+        """
+        :param historyFile: File to store the history in. Not persistent if None.
+        :param historyLength: Maximum number of items in the history.
+        """
+        self.history = self.History(historyLength, historyFile)
 
     def get_input(self, prompt):
         """
@@ -143,6 +279,20 @@ class Terminal:
 
         return shutil.get_terminal_size().columns
 
+    def get_height(self):
+        """Return current the number of lines of the terminal."""
+
+        return shutil.get_terminal_size().lines
+
+    def replace_lines(self, old, new):
+        """
+        Show lines new in place of lines old that were printed last.
+        Fallback: prints all of new below old.
+        """
+
+        for line in new:
+            self.print(line)
+
     def coloured(self, string, colour):
         """Fallback: returns string without change."""
 
@@ -3,6 +3,7 @@ Some utility functions that might be useful throughout the project.
 """
 
 from posixpath import split
+import re
 
 def table_layout(lens, maxWidth, separatorLength=1):
     """
@@ -72,6 +73,99 @@ def print_table(strs, maxWidth, separator=" ", prnt=print):
         prnt(separator.join("{{:<{:d}}}".format(widths[i][j]).format(strs[j*m+i])
                             for j in range(len(widths[i]))))
 
+def format_bytes(nbytes):
+    """
+    Format a number of bytes in human readable form using binary prefixes.
+
+    :param nbytes: Number of bytes.
+    :returns: String like '1.5 MiB'.
+    """
+
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(nbytes) < 1024 or unit == "TiB":
+            break
+        nbytes /= 1024
+    if unit == "B":
+        return "{:d} B".format(int(nbytes))
+    return "{:.1f} {}".format(nbytes, unit)
+
+def split_selection(spec):
+    """
+    Split an item specification like ``'data[0:10, 5]'`` into the path
+    and the selection inside the brackets.
+
+    :returns: Tuple of path and selection (empty string if there is none).
+    """
+
+    match = re.match(r"^(.*?)(?:\[(.*)\])?$", spec, re.DOTALL)
+    return match.group(1), match.group(2) or ""
+
+def parse_selection(string, shape):
+    """
+    Parse a NumPy style selection like ``'0:10, 5'`` for an array of given shape.
+
+    Each dimension can be selected by an integer or a slice with a positive step.
+    Dimensions that are not mentioned are selected completely.
+
+    :param string: String to parse; may be empty to select everything.
+    :param shape: Shape of the array to select from.
+
+    :returns:
+        Tuple of a list of slices with normalised start, stop, and step
+        and a list of bools indicating which dimensions were selected
+        by an integer and shall be dropped from the result.
+
+    :raises: ValueError if the string is not a valid selection.
+    """
+
+    parts = [part.strip() for part in string.split(",")] if string.strip() else []
+    if len(parts) > len(shape):
+        raise ValueError("too many indices for {}-dimensional dataset".format(len(shape)))
+
+    slices, dropped = [], []
+    for part, n in zip(parts+[":"]*(len(shape)-len(parts)), shape):
+        if ":" in part:
+            fields = part.split(":")
+            if len(fields) > 3:
+                raise ValueError("invalid slice: '{}'".format(part))
+            values = [int(f) if f.strip() else None for f in fields]+[None]*(3-len(fields))
+            start, stop, step = slice(*values).indices(n)
+            if step <= 0:
+                raise ValueError("only positive steps are supported")
+            slices.append(slice(start, max(start, stop), step))
+            dropped.append(False)
+        else:
+            index = int(part)
+            if index < 0:
+                index += n
+            if not 0 <= index < n:
+                raise ValueError("index {} is out of range for dimension of size {}"
+                                 .format(part, n))
+            slices.append(slice(index, index+1, 1))
+            dropped.append(True)
+    return slices, dropped
+
+def parse_predicate(string):
+    """
+    Parse a comparison with a number like ``'> 4000'``.
+    Supported operators are <, <=, >, >=, == and !=.
+
+    :returns: Tuple of operator (string) and number (int or float).
+    :raises: ValueError if string is not a valid comparison.
+    """
+
+    match = re.match(r"^\s*(<=|>=|==|!=|<|>)\s*(\S+)\s*$", string)
+    if not match:
+        raise ValueError("Invalid predicate '{}', expected e.g. '> 4000'".format(string))
+    try:
+        value = int(match.group(2))
+    except ValueError:
+        try:
+            value = float(match.group(2))
+        except ValueError:
+            raise ValueError("Invalid number '{}'".format(match.group(2))) from None
+    return match.group(1), value
+
 def split_path(spath):
     """
     Split a string representing a path into a list.
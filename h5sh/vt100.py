@@ -4,6 +4,7 @@ Module for the VT100 backend.
 
 import sys
 import os
+import codecs
 import termios
 import tty
 
@@ -23,16 +24,24 @@ class VT100(Terminal):
     and coloured output.
     """
 
-    def __init__(self):
-        super(VT100, self).__init__()
+    def __init__(self, historyFile=None, historyLength=500):
+        super(VT100, self).__init__(historyFile, historyLength)
 
         self.inFD = sys.stdin.fileno()
         self._rawMode = False
         self._oldattrs = None
-        self._inStr = ""
-        self._cursor = 0 # relative to inStr, not counting prompt
+        self._line = []  # list of characters of the input
+        self._cursor = 0 # relative to _line, not counting prompt
         self._prompt = "$ "
 
+        # what is currently displayed after the prompt; None if unknown
+        self._shown = []
+        self._shownCursor = 0
+
+        self._out = []  # output queued by _write()
+        self._pending = ""  # input that was read but not yet handled
+        self._decoder = codecs.getincrementaldecoder(sys.stdin.encoding or "utf-8")("replace")
+
         # function to handle a single character of input
         self._handle_input = self._default_input_handle
 
@@ -54,6 +63,7 @@ class VT100(Terminal):
         self._do[ASCII.CR]  = self._do_enter
         self._do[ASCII.ESC] = self._do_escape_sequence
         self._do[ASCII.DEL] = self._do_delete_backwards
+        self._do[ASCII.DC2] = self._do_reverse_search
         if have_psutil:
             self._do[ASCII.SUB] = self._do_suspend
 
@@ -93,54 +103,96 @@ class VT100(Terminal):
         termios.tcsetattr(self.inFD, termios.TCSADRAIN, self._oldattrs)
         self._rawMode = False
 
+    def _write(self, s):
+        """Queue s for output. Written to the terminal by _flush_output()."""
+
+        self._out.append(s)
+
+    def _flush_output(self):
+        """Write all queued output to the terminal at once."""
+
+        if self._out:
+            sys.stdout.write("".join(self._out))
+            sys.stdout.flush()
+            self._out = []
+
+    def _cursor_movement(self, start, end):
+        """Return escape sequence to move the cursor from column start to column end."""
+
+        if end < start:
+            return chr(ASCII.ESC)+("[D" if start-end == 1 else "[{}D".format(start-end))
+        if end > start:
+            return chr(ASCII.ESC)+("[C" if end-start == 1 else "[{}C".format(end-start))
+        return ""
+
+    def _redraw(self):
+        """
+        Bring the terminal up to date with the input line and cursor.
+        Only rewrites the part of the line after the first changed character.
+        """
+
+        if self._shown is None:
+            # display is in an unknown state, redraw everything
+            self._write("\r"+chr(ASCII.ESC)+"[K"+self._prompt+"".join(self._line))
+            self._shown = self._line[:]
+            self._shownCursor = len(self._line)
+
+        elif self._shown != self._line:
+            # find first character that changed
+            n = min(len(self._line), len(self._shown))
+            first = 0
+            while first < n and self._line[first] == self._shown[first]:
+                first += 1
+
+            self._write(self._cursor_movement(self._shownCursor, first)
+                        +"".join(self._line[first:]))
+            if len(self._shown) > len(self._line):
+                self._write(chr(ASCII.ESC)+"[K")
+            self._shown = self._line[:]
+            self._shownCursor = len(self._line)
+
+        self._write(self._cursor_movement(self._shownCursor, self._cursor))
+        self._shownCursor = self._cursor
+
+    def _new_line(self, text=""):
+        """
+        Finish the displayed line with text and start a new one with an empty prompt.
+        """
+
+        self._redraw()
+        self._write(text+"\r\n"+self._prompt)
+        self._line = []
+        self._cursor = 0
+        self._shown = []
+        self._shownCursor = 0
+
     def _move_cursor_left(self, amt=1):
         """Shift cursor left by amt."""
         
-        if amt == 0:
-            pass
-        elif self._cursor >= amt:
+        if self._cursor >= amt:
             self._cursor -= amt
-            if amt == 1:
-                self.print(chr(ASCII.ESC)+"[D", end="")
-            else:
-                self.print(chr(ASCII.ESC)+"[{}D".format(amt), end="")
 
     def _move_cursor_right(self, amt=1):
         """Shift cursor right by amt."""
         
-        if amt == 0:
-            pass
-        elif self._cursor <= len(self._inStr)-amt:
+        if self._cursor <= len(self._line)-amt:
             self._cursor += amt
-            if amt == 1:
-                self.print(chr(ASCII.ESC)+"[C", end="")
-            else:
-                self.print(chr(ASCII.ESC)+"[{}D".format(amt), end="")
-
-    def _clear_output_from_cursor(self):
-        """Erase all printed output to the right of cursor. Does not change _inStr"""
-
-        self.print(chr(ASCII.ESC)+"[K", end="")
 
     def _clear_input(self):
-        """Erase all input both in _inStr and in the terminal."""
+        """Erase all input. The terminal is updated by the next _redraw()."""
 
-        if self._inStr:
-            self._inStr = ""
-            if self._cursor > 0:
-                self._move_cursor_left(self._cursor)
-            self._clear_output_from_cursor()
+        self._line = []
+        self._cursor = 0
 
     def _do_up(self):
         """Handle 'cursor up' command. Navigates history."""
 
         try:
-            aux = self.history.back(self._inStr)
+            aux = self.history.back("".join(self._line))
         except IndexError:
             return
         self._clear_input()
-        if aux:
-            self._insert(aux)
+        self._insert(aux)
 
     def _do_down(self):
         """Handle 'cursor down' command. Navigates history."""
@@ -150,8 +202,7 @@ class VT100(Terminal):
         except IndexError:
             return
         self._clear_input()
-        if aux:
-            self._insert(aux)
+        self._insert(aux)
 
     def _do_right(self):
         """Handle 'cursor right' command. Simply shifts cursor."""
@@ -170,12 +221,12 @@ class VT100(Terminal):
         """
 
         # cleanly hand over the terminal
+        self._flush_output()
         if self._rawMode:
             self._reset()
             backToRaw = True
         else:
             backToRaw = False
-        currentCursor = self._cursor
 
         # suspend the current process (requires psutil)
         p = psutil.Process()
@@ -184,50 +235,33 @@ class VT100(Terminal):
         # re-initialize terminal
         if backToRaw:
             self._raw_mode()
-        self.print(self._prompt+self._inStr, end="")
-        self._cursor = len(self._inStr)
-        self._move_cursor_left(len(self._inStr)-currentCursor)
+        self._shown = None
 
     def _do_abort(self):
         """Abort and clear current input; reprint prompt."""
 
-        self.print("^C")
-        self._inStr = ""
-        self._cursor = 0
+        self._new_line("^C")
         self.history.reset()
-        self.print(self._prompt, end="")
 
     def _do_exit(self):
         """Returns 'exit' if input is empty."""
 
-        if not self._inStr:
-            self.print("exit")
+        if not self._line:
+            self._write("exit\r\n")
             return "exit"
 
     def _do_delete_backwards(self):
         """Remove one character before the cursor."""
 
         if self._cursor > 0:
-            left = self._inStr[:self._cursor-1]
-            right = self._inStr[self._cursor:]
-            self._inStr = left
-
-            self._move_cursor_left()
-            self._clear_output_from_cursor()
-            self._insert(right)
-            self._move_cursor_left(len(right))
+            self._cursor -= 1
+            del self._line[self._cursor]
 
     def _do_delete_forwards(self):
         """Remove one character after the cursor."""
 
-        if self._cursor < len(self._inStr):
-            left = self._inStr[:self._cursor]
-            right = self._inStr[self._cursor+1:]
-            self._inStr = left
-
-            self._clear_output_from_cursor()
-            self._insert(right)
-            self._move_cursor_left(len(right))
+        if self._cursor < len(self._line):
+            del self._line[self._cursor]
 
     def _do_autocomplete(self):
         """TODO: implement"""
@@ -239,13 +273,97 @@ class VT100(Terminal):
         Only reprints prompt if input is empty.
         """
 
-        if self._inStr:
-            self.history.append(self._inStr)
-            self.print()
-            return self._inStr
+        if self._line:
+            inp = "".join(self._line)
+            self.history.append(inp)
+            self._redraw()
+            self._write("\r\n")
+            return inp
         else:
-            self.print()
-            self.print(self._prompt, end="")
+            self._new_line()
+
+    def _do_reverse_search(self):
+        """Start reverse incremental search through the history."""
+
+        self._searchQuery = ""
+        self._searchMatch = None  # tuple of index and item
+        self._searchFailed = False
+        self._searchOriginal = "".join(self._line)
+        self._handle_input = self._search_input_handle
+        self._show_search()
+
+    def _search_history(self, before):
+        """Search history for current query in items before given index."""
+
+        if not self._searchQuery:
+            self._searchMatch = None
+            self._searchFailed = False
+            return
+
+        found = self.history.search(self._searchQuery, before)
+        if found:
+            self._searchMatch = found
+            self._searchFailed = False
+        else:
+            # keep showing the last match like bash does
+            self._searchFailed = True
+
+    def _show_search(self):
+        """Redraw the current line to show state of the search."""
+
+        self._write("\r{esc}[K{label}`{query}': {match}".format(
+            esc=chr(ASCII.ESC),
+            label="(failed reverse-i-search)" if self._searchFailed else "(reverse-i-search)",
+            query=self._searchQuery,
+            match=self._searchMatch[1] if self._searchMatch else ""))
+        self._shown = None  # line is replaced by search
+
+    def _end_search(self, accept):
+        """
+        Leave search mode and redraw prompt.
+        The input is set to the match if accept is True and to the input before
+        the search otherwise.
+        """
+
+        self._handle_input = self._default_input_handle
+        line = self._searchMatch[1] if accept and self._searchMatch else self._searchOriginal
+
+        self._clear_input()
+        self._insert(line)
+        self.history.reset()
+
+    def _search_input_handle(self, c):
+        """
+        Handle input during reverse search.
+        Control codes other than those for searching end the search and are
+        handled by _default_input_handle.
+
+        :returns:
+            Return value of _default_input_handle if the search was ended.
+        """
+
+        oc = ord(c)
+        if oc == ASCII.DC2:
+            # look for an older match
+            self._search_history(self._searchMatch[0] if self._searchMatch else None)
+        elif oc in (ASCII.BS, ASCII.DEL):
+            # shorter query, start over at the end of history
+            self._searchQuery = self._searchQuery[:-1]
+            self._searchMatch = None
+            self._search_history(None)
+        elif oc in (ASCII.ETX, ASCII.BEL):
+            # abort
+            self._end_search(False)
+            return None
+        elif oc < 32:
+            self._end_search(True)
+            return self._default_input_handle(c)
+        else:
+            # longer query, the current match might still fit
+            self._searchQuery += c
+            self._search_history(self._searchMatch[0]+1 if self._searchMatch else None)
+
+        self._show_search()
 
     def _do_escape_sequence(self):
         """Switch state to inputting escape sequence."""
@@ -261,16 +379,8 @@ class VT100(Terminal):
     def _insert(self, s):
         """Insert string s into the input at cursor; adjust cursor"""
 
-        # modify internal string
-        left = self._inStr[:self._cursor]
-        right = self._inStr[self._cursor:]
-        self._inStr = left+s+right
-
-        # display
-        # don't clear, just overwrite
-        self.print(s+right, end="")
-        self._cursor = len(self._inStr)
-        self._move_cursor_left(len(right))
+        self._line[self._cursor:self._cursor] = s
+        self._cursor += len(s)
 
     def _default_input_handle(self, c):
         """
@@ -325,6 +435,50 @@ class VT100(Terminal):
         self._raw_mode()
         return TermMngr(self)
 
+    def _read_input(self):
+        """
+        Return all input that is available; blocks until there is at least one character.
+        Pasted text thus arrives in one piece.
+        """
+
+        if self._pending:
+            chunk, self._pending = self._pending, ""
+            return chunk
+
+        chunk = ""
+        while not chunk:
+            # raw mode: returns as soon as anything is available
+            chunk = self._decoder.decode(os.read(self.inFD, 4096))
+        return chunk
+
+    def _handle_chunk(self, chunk):
+        """
+        Handle a chunk of input characters.
+        Characters after the end of the input line are kept for the next call to get_input().
+
+        :returns:
+            The entered line or None if the line is not finished yet.
+        """
+
+        i = 0
+        while i < len(chunk):
+            if self._handle_input == self._default_input_handle:
+                # insert runs of ordinary characters at once
+                j = i
+                while j < len(chunk) and ord(chunk[j]) not in self._do:
+                    j += 1
+                if j > i:
+                    self._insert(chunk[i:j])
+                    i = j
+                    continue
+
+            inp = self._handle_input(chunk[i])
+            i += 1
+            if inp:
+                self._pending = chunk[i:]
+                return inp
+        return None
+
     def get_input(self, prompt):
         """
         Query user for input.
@@ -335,12 +489,21 @@ class VT100(Terminal):
 
         self._prompt = prompt
         with self._activate():
-            self.print(self._prompt, end="")
-            self._inStr = ""
+            self._line = []
             self._cursor = 0
+            self._shown = []
+            self._shownCursor = 0
+            self._write(self._prompt)
+
             inp = None
             while not inp:
-                inp = self._handle_input(sys.stdin.read(1))
+                # one write per chunk of input
+                self._flush_output()
+                inp = self._handle_chunk(self._read_input())
+                if not inp and self._handle_input != self._search_input_handle:
+                    # the search takes care of displaying itself
+                    self._redraw()
+            self._flush_output()
         return inp
 
     def print(self, *args, end="\n", **kwargs):
@@ -349,6 +512,7 @@ class VT100(Terminal):
         The built in print function does not work properly when in raw mode.
         """
 
+        self._flush_output()
         if self._rawMode:
             outp = [s.replace("\n", "\n\r") if isinstance(s, str) else s for s in args]
             if end:
@@ -361,6 +525,26 @@ class VT100(Terminal):
 
         sys.stdout.flush()
 
+    def replace_lines(self, old, new):
+        """
+        Show lines new in place of lines old that were printed last.
+        Only lines that changed are rewritten. Lines must not be wider than the terminal.
+        """
+
+        self._flush_output()
+        if old:
+            # move to the first old line
+            self._write(chr(ASCII.ESC)+"[{}A".format(len(old)))
+        for i, line in enumerate(new):
+            if i >= len(old) or line != old[i]:
+                self._write("\r"+line+chr(ASCII.ESC)+"[K")
+            self._write("\r\n")
+        if len(old) > len(new):
+            # erase the remaining old lines and move back up
+            self._write((chr(ASCII.ESC)+"[K\r\n")*(len(old)-len(new))
+                        +chr(ASCII.ESC)+"[{}A".format(len(old)-len(new)))
+        self._flush_output()
+
     def coloured(self, string, colour):
         """
         Return string with colour codes attached based on given colour (Terminal.Colour).
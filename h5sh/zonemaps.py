@@ -0,0 +1,185 @@
+"""
+Zone maps: minima and maxima of consecutive zones of datasets to skip
+parts that cannot match a predicate.
+"""
+
+import operator
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from h5sh.h5data import block_length, read_blocks, read_selection
+
+# approximate number of bytes summarised by one zone
+ZONE_BYTES = 1024*1024
+
+# supported comparisons
+OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+             "==": operator.eq, "!=": operator.ne}
+
+class ZoneMap:
+    """
+    Minimum, maximum and whether there are NaNs for each zone of a dataset.
+    Zones are ranges of length elements along the first axis, aligned with chunks.
+    Minima and maxima ignore NaNs and are NaN if a zone contains nothing else.
+    """
+
+    def __init__(self, length, mins, maxs, nans):
+        self.length = length
+        self.mins = mins
+        self.maxs = maxs
+        self.nans = nans
+
+    def candidates(self, op, value):
+        """Return a boolean array that is False for zones that cannot contain a match."""
+
+        with np.errstate(invalid="ignore"):
+            if op in ("<", "<="):
+                return OPERATORS[op](self.mins, value)
+            if op in (">", ">="):
+                return OPERATORS[op](self.maxs, value)
+            if op == "==":
+                return (self.mins <= value) & (self.maxs >= value)
+            # NaN compares unequal to everything
+            return self.nans | (self.mins != value) | (self.maxs != value)
+
+
+class ZoneMapStore:
+    """
+    Stores zone maps in an SQLite database.
+
+    Zone maps are keyed by the identity of the file (see digests.file_identity())
+    and the address of the dataset in the file. Only the most recent zone map
+    of a dataset, identified by file name and path, is kept.
+    """
+
+    def __init__(self, fname):
+        """
+        :param fname: Name of the database file. Created if it does not exist.
+        """
+
+        self._db = sqlite3.connect(fname)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS zonemaps (
+                              file TEXT, addr INTEGER, fname TEXT, path TEXT,
+                              length INTEGER, dtype TEXT, mins BLOB, maxs BLOB, nans BLOB,
+                              time REAL,
+                              PRIMARY KEY (file, addr))""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS zonemaps_path ON zonemaps (fname, path)")
+        self._db.commit()
+
+    def close(self):
+        """Close the database."""
+        self._db.close()
+
+    def lookup(self, identity, addr):
+        """Return the ZoneMap of the dataset at addr in given file or None if unknown."""
+
+        row = self._db.execute("""SELECT length, dtype, mins, maxs, nans FROM zonemaps
+                                  WHERE file=? AND addr=?""", (identity, addr)).fetchone()
+        if not row:
+            return None
+        dtype = np.dtype(row[1])
+        return ZoneMap(row[0], np.frombuffer(row[2], dtype), np.frombuffer(row[3], dtype),
+                       np.frombuffer(row[4], bool))
+
+    def store(self, identity, fname, addr, path, zoneMap):
+        """Store the zone map of a dataset, replacing older ones of the same dataset."""
+
+        fname = os.path.realpath(fname)
+        with self._db:
+            self._db.execute("DELETE FROM zonemaps WHERE fname=? AND path=?", (fname, path))
+            self._db.execute("INSERT OR REPLACE INTO zonemaps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             (identity, addr, fname, path, zoneMap.length,
+                              zoneMap.mins.dtype.str, zoneMap.mins.tobytes(),
+                              zoneMap.maxs.tobytes(), zoneMap.nans.tobytes(), time.time()))
+
+
+def zone_length(dset):
+    """Return the number of elements along the first axis of the zones of a dataset."""
+    return block_length(dset, ZONE_BYTES)
+
+def scan(dset, op, value, check=None):
+    """
+    Evaluate a predicate on all elements of a dataset with at least one axis
+    and build its zone map at the same time.
+
+    :returns:
+        Tuple of ZoneMap and generator of tuples (indices, values) of matches
+        per block. The zone map is complete once the generator is exhausted.
+    """
+
+    length = zone_length(dset)
+    nzones = -(-dset.shape[0]//length)
+    zoneMap = ZoneMap(length, np.zeros(nzones, dset.dtype), np.zeros(nzones, dset.dtype),
+                      np.zeros(nzones, bool))
+    slices = [slice(0, n, 1) for n in dset.shape]
+
+    def matches():
+        seen = np.zeros(nzones, bool)
+        for start, stop, block in read_blocks(dset, slices, check):
+            rows = block.reshape(stop-start, -1)
+            first = start//length
+            zones = np.arange(first, (stop-1)//length+1)
+            bounds = np.maximum(zones*length-start, 0)
+            mins = np.fmin.reduceat(np.fmin.reduce(rows, axis=1), bounds)
+            maxs = np.fmax.reduceat(np.fmax.reduce(rows, axis=1), bounds)
+            nans = np.logical_or.reduceat(np.isnan(rows).any(axis=1), bounds) \
+                if rows.dtype.kind == "f" else np.zeros(len(zones), bool)
+            if seen[first]:
+                # zone continues from the previous block
+                mins[0] = np.fmin(mins[0], zoneMap.mins[first])
+                maxs[0] = np.fmax(maxs[0], zoneMap.maxs[first])
+                nans[0] |= zoneMap.nans[first]
+            zoneMap.mins[zones] = mins
+            zoneMap.maxs[zones] = maxs
+            zoneMap.nans[zones] |= nans
+            seen[zones] = True
+
+            yield _evaluate(block, start, op, value)
+
+    return zoneMap, matches()
+
+def search(dset, zoneMap, op, value, check=None):
+    """
+    Evaluate a predicate on the zones of a dataset that may contain matches.
+    Consecutive candidate zones are read together.
+
+    :returns:
+        Tuple of the number of zones to read and generator of tuples
+        (indices, values) of matches per read.
+    """
+
+    candidates = np.flatnonzero(zoneMap.candidates(op, value))
+    maxZones = max(block_length(dset)//zoneMap.length, 1)
+
+    # merge runs of consecutive zones
+    runs = []
+    for zone in candidates:
+        if runs and runs[-1][1] == zone and runs[-1][1]-runs[-1][0] < maxZones:
+            runs[-1][1] = zone+1
+        else:
+            runs.append([zone, zone+1])
+
+    def matches():
+        for first, last in runs:
+            if check:
+                check()
+            start = int(first)*zoneMap.length
+            stop = min(int(last)*zoneMap.length, dset.shape[0])
+            block = read_selection(dset, [slice(start, stop, 1)]
+                                   +[slice(0, n, 1) for n in dset.shape[1:]], check=check)
+            yield _evaluate(block, start, op, value)
+
+    return len(candidates), matches()
+
+def _evaluate(block, start, op, value):
+    """Return indices into the dataset and values of elements of block that match."""
+
+    with np.errstate(invalid="ignore"):
+        mask = OPERATORS[op](block, value)
+    indices = np.nonzero(mask)
+    values = block[indices]
+    indices = (indices[0]+start,)+indices[1:]
+    return indices, values
@@ -27,7 +27,8 @@ setup(
     license="MIT",
     packages=["h5sh", "h5sh/commands"],
     entry_points={
-        "console_scripts": ["h5sh=h5sh.command_line:main"]
+        "console_scripts": ["h5sh=h5sh.command_line:main",
+                            "h5shc=h5sh.client:main"]
     },
     requires=["h5py"],
     extras_require={
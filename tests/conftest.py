@@ -0,0 +1,30 @@
+"""
+Shared fixtures for the tests.
+"""
+
+import pytest
+
+from h5sh import h5shell
+from h5sh.batch import CaptureTerminal, split_script
+from h5sh.h5manager import H5Manager
+
+@pytest.fixture
+def shell(tmp_path, monkeypatch):
+    """
+    Function that runs a script of commands on a file and returns the output lines.
+    Databases are kept in tmp_path.
+    """
+
+    for name in ("DIGEST_FILE", "INDEX_FILE", "ZONEMAP_FILE"):
+        monkeypatch.setattr(h5shell, name, str(tmp_path/(name.lower()+".sqlite")))
+
+    def run(fname, script):
+        term = CaptureTerminal()
+        h5mngr = H5Manager(fname, background=False)
+        try:
+            h5shell.H5shell(term).run_script(split_script(script), h5mngr)
+        finally:
+            h5mngr.close()
+        return term.get_output()
+
+    return run
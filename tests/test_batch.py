@@ -0,0 +1,63 @@
+"""
+Tests for h5sh.batch.
+"""
+
+import os
+import subprocess
+import sys
+
+import h5py as h5
+import numpy as np
+import pytest
+
+from h5sh.batch import run_file, split_script
+from h5sh.h5shell import H5shell
+
+@pytest.mark.parametrize("script, expected", [
+    ("cd x; ls", [["cd", "x"], ["ls"]]),
+    ("pwd\nls -l\n\n", [["pwd"], ["ls", "-l"]]),
+    ("head a/z[0:2,1]", [["head", "a/z[0:2,1]"]]),
+    ("export a/x[0:3] out.raw -f", [["export", "a/x[0:3]", "out.raw", "-f"]]),
+    ("head table --fields t,energy", [["head", "table", "--fields", "t,energy"]]),
+    ("query 'SELECT count(*) FROM items'", [["query", "SELECT count(*) FROM items"]]),
+    ("where x '> 4000' ; tail -n 3 x", [["where", "x", "> 4000"], ["tail", "-n", "3", "x"]]),
+    ("query \"SELECT 1; SELECT 2\"; pwd", [["query", "SELECT 1; SELECT 2"], ["pwd"]]),
+    (r"echo a\;b", [["echo", "a;b"]]),
+    (";;", []),
+])
+def test_split_script(script, expected):
+    assert split_script(script) == expected
+
+def test_split_script_unbalanced_quote():
+    with pytest.raises(ValueError):
+        split_script("query 'SELECT 1")
+
+@pytest.fixture
+def small_file(tmp_path):
+    fname = str(tmp_path/"small.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("x", data=np.arange(5))
+    return fname
+
+def _h5sh(*args, home):
+    """Run h5sh in a new process and return the completed process."""
+
+    return subprocess.run([sys.executable, "-c", "from h5sh.command_line import main; main()"]
+                          +list(args), capture_output=True, text=True,
+                          env=dict(os.environ, HOME=str(home)), timeout=60)
+
+def test_command_exit_status(small_file, tmp_path):
+    result = _h5sh(small_file, "-c", "head x[1:3]", home=tmp_path)
+    assert result.returncode == 0
+    assert result.stdout.split() == ["1", "1", "2", "2"]
+
+    result = _h5sh(small_file, "-c", "pwd; nosuch", home=tmp_path)
+    assert result.returncode == 1
+    assert "nosuch: command not found" in result.stdout
+
+def test_run_file_reports_errors(small_file, tmp_path):
+    fname, lines, error = run_file(H5shell, small_file, split_script("nosuch"), {}, 80)
+    assert error == "exit status 127"
+
+    fname, lines, error = run_file(H5shell, str(tmp_path/"missing.h5"), [["pwd"]], {}, 80)
+    assert error is not None and lines == []
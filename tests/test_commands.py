@@ -0,0 +1,112 @@
+"""
+Tests for commands run through the shell.
+"""
+
+import h5py as h5
+import numpy as np
+import pytest
+
+@pytest.fixture
+def typed_file(tmp_path):
+    """File with a named datatype next to a chunked dataset."""
+
+    fname = str(tmp_path/"typed.h5")
+    with h5.File(fname, "w") as f:
+        f["mytype"] = np.dtype("f4")
+        f.create_dataset("data", data=np.arange(10, dtype="f4"), chunks=(5,))
+    return fname
+
+def test_ls_shows_named_datatype(shell, typed_file):
+    output = shell(typed_file, "ls -l")
+    assert output[1].split() == ["mytype", "(named", "datatype", "float32)"]
+
+def test_chunks_skips_named_datatype(shell, typed_file):
+    output = shell(typed_file, "chunks *")
+    assert output[0] == "/data"
+    assert not any("mytype" in line for line in output)
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_checksum_skips_named_datatype(shell, typed_file, jobs):
+    output = shell(typed_file, "checksum -j {}".format(jobs))
+    assert len(output) == 1
+    assert output[0].endswith("  /data")
+
+def test_count_ignores_named_datatype(shell, typed_file):
+    output = shell(typed_file, "count")
+    assert output[1].split()[:4] == ["0", "1", "0", "0"]
+
+def test_ls_lists_hard_links_like_their_object(shell, tmp_path):
+    fname = str(tmp_path/"hard.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("a", data=np.zeros(3, dtype="i2"))
+        f["b"] = f["a"]
+    output = shell(fname, "ls -l")
+    assert [line.split() for line in output] == [["a", "{3}", "(int16)"], ["b", "{3}", "(int16)"]]
+
+def test_help_summaries_fit_on_one_line(shell, typed_file):
+    summaries = [line.split("  =  ", 1)[1] for line in shell(typed_file, "help")
+                 if "  =  " in line]
+    assert "Compare two groups by names, kinds, shapes, dtypes and link targets of their items" \
+        in summaries
+    assert not any("  " in summary for summary in summaries)
+
+def test_diff_reports_names_and_dtypes(shell, tmp_path):
+    first, second = str(tmp_path/"first.h5"), str(tmp_path/"second.h5")
+    with h5.File(first, "w") as f:
+        f.create_dataset("v", data=np.zeros(3, dtype="i4"))
+        f.create_dataset("g/x", data=np.zeros(3))
+        f["g/l"] = h5.SoftLink("/v")
+    with h5.File(second, "w") as f:
+        f.create_dataset("v", data=np.zeros(3, dtype="i8"))
+        f.create_dataset("g/y", data=np.zeros(3))
+        f["g/l"] = h5.SoftLink("/v")
+    output = shell(first, "diff / {}//".format(second))
+    assert output == ["- g/x", "+ g/y", "~ v  dtype: int32 != int64"]
+
+def test_where_reuses_zone_maps(shell, tmp_path):
+    fname = str(tmp_path/"zones.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("v", data=np.arange(2**20, dtype="i8"), chunks=(2**16,))
+    output = shell(fname, "where v '>= 1048574'; where v '>= 1048574'; where v '< 0'")
+    assert output == ["1048574  1048574", "1048575  1048575", "2 matches, read 8 of 8 zones",
+                      "1048574  1048574", "1048575  1048575", "2 matches, read 1 of 8 zones",
+                      "0 matches, read 0 of 8 zones"]
+
+@pytest.fixture
+def record_file(tmp_path):
+    """File with a compound dataset next to a plain one."""
+
+    fname = str(tmp_path/"records.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("rec", data=np.array([(1, 2.5), (2, 3.5), (3, 4.5)],
+                                              dtype=[("id", "i4"), ("t", "f8")]))
+        f.create_dataset("v", data=np.arange(5))
+    return fname
+
+def test_head_reads_selected_fields(shell, record_file):
+    output = shell(record_file, "head rec[1:3] --fields id,t; head rec --fields nope; head v --fields id")
+    assert output == ["   id    t", "1   2  3.5", "2   3  4.5",
+                      "h5sh: head: rec: No such field 'nope'",
+                      "h5sh: head: v: Not a compound dataset"]
+
+def test_ls_lists_fields(shell, record_file):
+    output = shell(record_file, "ls -l --fields rec")
+    assert [line.split() for line in output] == [["rec", "{3}", "(compound,", "2", "fields)"],
+                                                 ["id", "int32"], ["t", "float64"]]
+
+def test_query_after_index(shell, record_file):
+    output = shell(record_file, "index; query 'select path, kind from items order by path';"
+                                " query 'select nosuch'")
+    assert output == ["indexed 3 items",
+                      "path  kind", "/     group", "/rec  dataset", "/v    dataset", "(3 rows)",
+                      "h5sh: query: no such column: nosuch"]
+
+def test_tree_shows_linked_groups_without_entering_them(shell, tmp_path):
+    fname = str(tmp_path/"tree.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("a/b/x", data=np.zeros(2))
+        f["l"] = h5.SoftLink("/a")
+    output = shell(fname, "tree; tree -L 1")
+    assert output == ["/", "├── a/", "│   └── b/", "│       └── x", "└── l/ -> /a",
+                      "", "2 groups, 1 datasets",
+                      "/", "├── a/", "└── l/ -> /a", "", "1 groups, 0 datasets"]
@@ -0,0 +1,59 @@
+"""
+Tests for h5sh.h5manager.
+"""
+
+import h5py as h5
+import numpy as np
+import pytest
+
+from h5sh.h5manager import Counts, H5Manager
+
+@pytest.fixture
+def linked_file(tmp_path):
+    """File with a soft link to a group, listed before the group itself."""
+
+    fname = str(tmp_path/"linked.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("z/x", data=np.zeros(4, dtype="i8"))
+        f["a"] = h5.SoftLink("/z")
+    return fname
+
+@pytest.mark.parametrize("background", [False, True])
+def test_counts_with_soft_link_to_group(linked_file, background):
+    h5mngr = H5Manager(linked_file, background=background)
+    try:
+        # linked groups count as links and are not entered
+        assert h5mngr.get_counts([]) == Counts(1, 1, 1, 0, 32)
+        assert h5mngr.get_counts(["z"]) == Counts(0, 1, 0, 0, 32)
+        if not background:
+            # known from crawling without loading anything on demand
+            assert h5mngr._root.counts == Counts(1, 1, 1, 0, 32)
+    finally:
+        h5mngr.close()
+
+def test_walk_does_not_follow_links(tmp_path):
+    fname = str(tmp_path/"cycle.h5")
+    with h5.File(fname, "w") as f:
+        f.create_dataset("g/x", data=np.zeros(4))
+        f["g/up"] = h5.SoftLink("/g")
+
+    h5mngr = H5Manager(fname, background=False)
+    try:
+        assert [path for path, _ in h5mngr.walk([])] == [[], ["g"]]
+    finally:
+        h5mngr.close()
+
+def test_counts_while_crawler_evicts(tmp_path):
+    fname = str(tmp_path/"many.h5")
+    with h5.File(fname, "w") as f:
+        for i in range(40):
+            for j in range(30):
+                f.create_dataset("g{:02d}/h{:02d}/x".format(i, j), data=np.zeros(2, dtype="i4"))
+
+    for _ in range(10):
+        # the crawler fills the cache and evicts groups while the counts are computed
+        h5mngr = H5Manager(fname, background=True, maxCacheBytes=5000)
+        try:
+            assert h5mngr.get_counts([]) == Counts(1240, 1200, 0, 0, 9600)
+        finally:
+            h5mngr.close()
@@ -0,0 +1,99 @@
+"""
+Tests for the server used by h5shc.
+"""
+
+import json
+import socket
+import threading
+
+import h5py as h5
+import numpy as np
+import pytest
+
+from h5sh.h5shell import H5shell
+from h5sh.server import Server
+
+@pytest.fixture
+def server(tmp_path):
+    """Server with room for one file, running in a thread."""
+
+    server = Server(H5shell, str(tmp_path/"s.sock"), {"background": False}, maxFiles=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+def _make_file(fname):
+    dtype = np.dtype([("t", "f8"), ("energy", "f4"), ("id", "i4")])
+    table = np.zeros(5, dtype)
+    table["t"] = np.arange(5)
+    table["energy"] = np.arange(5)*2
+    with h5.File(fname, "w") as f:
+        f.create_dataset("table", data=table)
+    return fname
+
+def _connect(server, **request):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(30)
+    sock.connect(server.server_address)
+    stream = sock.makefile("rwb")
+    stream.write(json.dumps(dict(request, width=80)).encode("utf-8")+b"\n")
+    stream.flush()
+    return sock, stream
+
+def _request(server, **request):
+    """Send a request and return tuple of output, status and error message."""
+
+    sock, stream = _connect(server, **request)
+    output = []
+    with sock, stream:
+        for line in stream:
+            message = json.loads(line)
+            if "out" in message:
+                output.append(message["out"])
+            else:
+                return "".join(output), message["status"], message.get("error")
+    raise AssertionError("no status received")
+
+def test_round_trip(server, tmp_path):
+    fname = _make_file(str(tmp_path/"a.h5"))
+
+    output, status, _ = _request(server, file=fname,
+                                 args=["head", "table[1:3]", "--fields", "t,energy"])
+    assert status == 0
+    assert output.split() == ["t", "energy", "1", "1.", "2.", "2", "2.", "4."]
+
+    output, status, _ = _request(server, file=fname, script="cd /; head table[0:2] --fields id,t")
+    assert status == 0 and output.split() == ["id", "t", "0", "0", "0.", "1", "0", "1."]
+
+    _, status, _ = _request(server, file=fname, args=["nosuch"])
+    assert status == 127
+
+def test_removed_file(server, tmp_path):
+    fname = _make_file(str(tmp_path/"a.h5"))
+    assert _request(server, file=fname, script="ls")[1] == 0
+
+    (tmp_path/"a.h5").unlink()
+    _, status, error = _request(server, file=fname, script="ls")
+    assert status == 1 and "FileNotFoundError" in error
+    _, status, error = _request(server, file=fname, script="ls")
+    assert status == 1 and "FileNotFoundError" in error
+
+    # a new file with the same name is opened again
+    _make_file(fname)
+    output, status, _ = _request(server, file=fname, script="ls")
+    assert status == 0 and output.split() == ["table"]
+
+def test_eviction_does_not_wait_for_long_requests(server, tmp_path):
+    first = _make_file(str(tmp_path/"a.h5"))
+    second = _make_file(str(tmp_path/"b.h5"))
+
+    # keeps the lock of the first file until the connection is closed
+    sock, stream = _connect(server, file=first, args=["watch", "-n", "0.05", "pwd"])
+    with sock, stream:
+        assert "out" in json.loads(stream.readline())
+        # evicts the first file
+        output, status, _ = _request(server, file=second, script="ls")
+        assert status == 0 and output.split() == ["table"]